@@ -1,5 +1,6 @@
 import pigpio
-from time import sleep
+import threading
+from collections import deque
 
 pi = pigpio.pi()
 
@@ -26,64 +27,139 @@ def _set_color(red, green, blue):
     pi.set_PWM_dutycycle(_GREEN_PIN, green)
     pi.set_PWM_dutycycle(_BLUE_PIN, blue)
 
-def _set_red():
-    _set_color(255, 0, 0)
+_OFF = (0, 0, 0)
+_RED = (255, 0, 0)
+_GREEN = (0, 255, 0)
 
-def _set_green():
-    _set_color(0, 255, 0)
 
-def _flash(color_func, times=1, flash_duration=_FLASH_DURATION, pause_duration=_PAUSE_DURATION):
+def _flash_steps(color, times=1, flash_duration=_FLASH_DURATION, pause_duration=_PAUSE_DURATION):
     """
-    Internal flash implementation (private)
-    :param color_func: Function to set the color (_set_red or _set_green)
+    Animation steps for flashing a color
+    :param color: (red, green, blue) duty cycles to flash
     :param times: Number of flashes
     :param flash_duration: How long each flash lasts
     :param pause_duration: How long between flashes
     """
+    steps = []
     for i in range(times):
-        color_func()
-        sleep(flash_duration)
-        _turn_off()
-        if i < times - 1:
-            sleep(pause_duration)
+        steps.append((color, flash_duration))
+        steps.append((_OFF, pause_duration if i < times - 1 else 0))
+    return steps
+
+
+class _Animator:
+    """
+    Plays LED animations on its own thread so callers (MQTT callbacks)
+    return immediately.
+
+    An animation is a list of ((red, green, blue), seconds) steps. New
+    animations either queue behind the current one or preempt it, which
+    cuts it short and drops anything queued. Protected animations (game
+    results) are never cut short or dropped; a preempting animation plays
+    after them instead. Between animations the LED
+    shows the resting color (e.g. whose turn it is); changing it never
+    waits for an animation to finish.
+    """
+
+    def __init__(self):
+        self._condition = threading.Condition()
+        self._queue = deque()
+        self._resting = _OFF
+        self._resting_changes = 0
+        self._shown = None
+        self._playing_protected = False
+        self._generation = 0
+        self._running = True
+        self._thread = threading.Thread(target=self._run, name='led-animator', daemon=True)
+        self._thread.start()
+
+    def play(self, steps, preempt=False, resting=None, protected=False):
+        """
+        Queue an animation; resting, if given, becomes the resting color once
+        it ends, unless set_resting is called in the meantime.
+        """
+        with self._condition:
+            if preempt:
+                kept = [animation for animation in self._queue if animation[2]]
+                self._queue.clear()
+                self._queue.extend(kept)
+                if not self._playing_protected:
+                    self._generation += 1
+            self._queue.append((steps, resting, protected, self._resting_changes))
+            self._condition.notify_all()
+
+    def set_resting(self, color):
+        """Show color now, or as soon as the current animation ends."""
+        with self._condition:
+            self._resting = color
+            self._resting_changes += 1
+            self._condition.notify_all()
+
+    def stop(self):
+        with self._condition:
+            self._running = False
+            self._generation += 1
+            self._condition.notify_all()
+        self._thread.join()
+
+    def _run(self):
+        while True:
+            with self._condition:
+                while self._running and not self._queue and self._shown == self._resting:
+                    self._condition.wait()
+                if not self._running:
+                    return
+                if not self._queue:
+                    self._shown = self._resting
+                    _set_color(*self._shown)
+                    continue
+                steps, resting, self._playing_protected, resting_changes = self._queue.popleft()
+                generation = self._generation
+
+            for color, seconds in steps:
+                _set_color(*color)
+                with self._condition:
+                    if self._condition.wait_for(lambda: self._generation != generation, seconds):
+                        break
+
+            with self._condition:
+                self._playing_protected = False
+                # A turn color set after the animation was queued is newer than its resting color.
+                if resting is not None and self._resting_changes == resting_changes:
+                    self._resting = resting
+                # Whatever the animation left lit, go back to the resting color.
+                self._shown = None
+
+
+_animator = _Animator()
+
 
 def players_turn(is_players_turn):
     """
     Set LED color based on whose turn it is
     :param is_players_turn: True for player's turn (green), False for opponent's turn (red)
     """
-    if is_players_turn:
-        _set_green()
-    else:
-        _set_red()
+    _animator.set_resting(_GREEN if is_players_turn else _RED)
 
-def valid_move(is_valid):
+def valid_move(is_valid, preempt=True):
     """
     Provide visual feedback about move validity
     :param is_valid: True for valid move (green flash), False for invalid move (red flash)
+    :param preempt: Cut short any animation still playing instead of queueing behind it,
+        except a win/lose animation, which always plays in full first
     """
-    was_red = pi.get_PWM_dutycycle(_RED_PIN) > 0
-    was_green = pi.get_PWM_dutycycle(_GREEN_PIN) > 0
-
-    if is_valid:
-        _flash(_set_green, times=2)
-    else:
-        _flash(_set_red, times=2)
-
-    _set_green() if was_green else _set_red()
+    _animator.play(_flash_steps(_GREEN if is_valid else _RED, times=2), preempt=preempt)
 
-def win_lose(did_win):
+def win_lose(did_win, preempt=False):
     """
     Provide win/lose feedback
     :param did_win: True for win (green flash), False for lose (red flash)
+    :param preempt: Cut short any animation still playing instead of queueing behind it
     """
-    if did_win:
-        _set_green()
-        _flash(_set_green, times=3)
-    else:
-        _set_red()
-        _flash(_set_red, times=3)
+    # Protected, so the move flash that follows a winning move cannot cancel it.
+    _animator.play(_flash_steps(_GREEN if did_win else _RED, times=3), preempt=preempt, resting=_OFF, protected=True)
 
 def cleanup():
+    _animator.stop()
     _turn_off()
     pi.stop()
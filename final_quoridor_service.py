@@ -14,11 +14,12 @@ MQTT_CLIENT_ID = "quoridor"
 # Run in background of lampi with system service
 
 class LampService:
-    def __init__(self):
-        self._client = self._create_and_configure_broker_client()
+    def __init__(self, client_factory=mqtt.Client):
+        # client_factory can be an in-memory stand-in to run without the broker
+        self._client = self._create_and_configure_broker_client(client_factory)
 
-    def _create_and_configure_broker_client(self):
-        client = mqtt.Client(client_id=MQTT_CLIENT_ID, protocol=MQTT_VERSION)
+    def _create_and_configure_broker_client(self, client_factory):
+        client = client_factory(client_id=MQTT_CLIENT_ID, protocol=MQTT_VERSION)
         client.on_connect = self.on_connect
         client.message_callback_add(TOPIC_QUORIDOR_MOVE, self.on_valid_move)
         client.message_callback_add(TOPIC_QUORIDOR_TURN, self.on_player_turn)
@@ -0,0 +1,144 @@
+import time
+from typing import List, Optional
+
+from .board import Position, BOARD_SIZE
+from .mcts import MCTSPlayer
+from .transposition import TranspositionTable, EXACT, LOWER_BOUND, UPPER_BOUND
+
+
+class _SearchTimeout(Exception):
+    """Raised inside the search once the time budget is spent."""
+
+
+class AlphaBetaPlayer:
+    """
+    Negamax alpha-beta player with iterative deepening under a time budget.
+
+    Positions are scored by the difference in shortest-path lengths, with
+    fences in hand as a tie-breaker. Fence moves are limited to those that
+    cut the opponent's current shortest path, which keeps the branching
+    factor small enough for a few plies in pure Python.
+    """
+
+    WIN_SCORE = 100000
+    PATH_WEIGHT = 100
+    FENCE_WEIGHT = 1
+
+    def __init__(self, time_budget_ms: int = 500, max_depth: int = 32,
+                 table: Optional[TranspositionTable] = None):
+        self.time_budget_ms = time_budget_ms
+        self.max_depth = max_depth
+        self.table = table or TranspositionTable()
+        self.nodes = 0
+        self._deadline = 0.0
+
+    def choose_move(self, position: Position) -> int:
+        """Return the best move found for the side to move within the budget."""
+        self._deadline = time.monotonic() + self.time_budget_ms / 1000
+        self.nodes = 0
+        self.table.new_search()
+
+        moves = self._ordered_moves(position, None)
+        best_move = moves[0]
+        for depth in range(1, self.max_depth + 1):
+            try:
+                score, move = self._search_root(position, moves, depth)
+            except _SearchTimeout:
+                break
+            best_move = move
+            moves.remove(move)
+            moves.insert(0, move)
+            if abs(score) >= self.WIN_SCORE - self.max_depth:
+                break
+        return best_move
+
+    def evaluate(self, position: Position) -> int:
+        """Static score from the point of view of the side to move."""
+        player = position.to_move
+        opponent = 1 - player
+        own = position.distance(player)
+        other = position.distance(opponent)
+        return (
+            (other - own) * self.PATH_WEIGHT +
+            (position.fences_left[player] - position.fences_left[opponent]) * self.FENCE_WEIGHT
+        )
+
+    def _search_root(self, position: Position, moves: List[int], depth: int):
+        """Search every root move to depth and return (score, best move)."""
+        alpha, beta = -self.WIN_SCORE - 1, self.WIN_SCORE + 1
+        best_move = moves[0]
+        for move in moves:
+            child = position.copy()
+            child.play(move)
+            score = -self._negamax(child, depth - 1, -beta, -alpha, 1)
+            if score > alpha:
+                alpha, best_move = score, move
+        return alpha, best_move
+
+    def _negamax(self, position: Position, depth: int, alpha: int, beta: int, ply: int) -> int:
+        """Fail-soft negamax with transposition-table cutoffs."""
+        self.nodes += 1
+        if time.monotonic() > self._deadline:
+            raise _SearchTimeout
+
+        if position.is_goal(1 - position.to_move):
+            return -(self.WIN_SCORE - ply)
+        if depth == 0:
+            return self.evaluate(position)
+
+        original_alpha = alpha
+        best_move = None
+        entry = self.table.probe(position.key)
+        if entry is not None:
+            best_move = entry.best_move
+            if entry.depth >= depth:
+                if entry.bound == EXACT:
+                    return entry.score
+                if entry.bound == LOWER_BOUND:
+                    alpha = max(alpha, entry.score)
+                elif entry.bound == UPPER_BOUND:
+                    beta = min(beta, entry.score)
+                if alpha >= beta:
+                    return entry.score
+
+        best_score = -self.WIN_SCORE - 1
+        for move in self._ordered_moves(position, best_move):
+            child = position.copy()
+            child.play(move)
+            score = -self._negamax(child, depth - 1, -beta, -alpha, ply + 1)
+            if score > best_score:
+                best_score, best_move = score, move
+            if score > alpha:
+                alpha = score
+            if alpha >= beta:
+                break
+
+        if best_score <= original_alpha:
+            bound = UPPER_BOUND
+        elif best_score >= beta:
+            bound = LOWER_BOUND
+        else:
+            bound = EXACT
+        self.table.store(position.key, depth, best_score, bound, best_move)
+        return best_score
+
+    def _ordered_moves(self, position: Position, first: Optional[int]) -> List[int]:
+        """Pawn moves by progress towards goal, then path-cutting fences; first leads."""
+        player = position.to_move
+        goal_row = position.goal_rows[player]
+        moves = sorted(
+            position.pawn_moves(player),
+            key=lambda sq: abs(goal_row - sq // BOARD_SIZE)
+        )
+        moves += position.blocking_fences(player)
+        if first is not None and first in moves:
+            moves.remove(first)
+            moves.insert(0, first)
+        return moves
+
+
+# Bots selectable for a game's player2, by the name stored on Game.player2_bot.
+BOTS = {
+    'alphabeta': AlphaBetaPlayer,
+    'mcts': MCTSPlayer,
+}
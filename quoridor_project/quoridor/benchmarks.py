@@ -0,0 +1,187 @@
+import platform
+import random
+import time
+from datetime import datetime, timezone
+from typing import Callable, Dict, Iterable, List, Optional
+
+from django.db import transaction
+
+from .board import Position, coords, decode_fence, is_fence_move
+from .game import QuoridorEngine
+from .models import Game
+
+
+def seeded_game(seed: int, max_plies: int = 120) -> List[int]:
+    """
+    Deterministic game used as the benchmark workload.
+
+    Pawns mostly follow their shortest path and fences are drawn from the
+    ones that cut the opponent's path, so the game exercises both move
+    kinds and ends with a realistic number of fences on the board.
+    """
+    rng = random.Random(seed)
+    position = Position()
+    moves = []
+    while len(moves) < max_plies:
+        player = position.to_move
+        fences = position.blocking_fences(player) if rng.random() < 0.3 else []
+        if fences:
+            move = rng.choice(fences)
+        else:
+            path = position.shortest_path(player)
+            pawn_moves = position.pawn_moves(player)
+            move = path[1] if path[1] in pawn_moves else rng.choice(pawn_moves)
+        position.play(move)
+        moves.append(move)
+        if position.is_goal(player):
+            break
+    return moves
+
+
+def seeded_positions(moves: Iterable[int]) -> List[Position]:
+    """Every position along a game, starting from the initial one."""
+    position = Position()
+    positions = [position.copy()]
+    for move in moves:
+        position.play(move)
+        positions.append(position.copy())
+    return positions
+
+
+def _summarize(samples_ns: List[int]) -> dict:
+    """ops/sec plus p50/p99 latency for a list of per-op timings."""
+    ordered = sorted(samples_ns)
+    total = sum(ordered)
+    return {
+        'samples': len(ordered),
+        'ops_per_sec': len(ordered) / (total / 1e9) if total else 0.0,
+        'p50_us': ordered[len(ordered) // 2] / 1000,
+        'p99_us': ordered[min(len(ordered) - 1, int(len(ordered) * 0.99))] / 1000,
+    }
+
+
+def _time_each(operations: Iterable[Callable[[], object]]) -> dict:
+    """Run and time each zero-argument callable individually."""
+    samples = []
+    for operation in operations:
+        started = time.perf_counter_ns()
+        operation()
+        samples.append(time.perf_counter_ns() - started)
+    return _summarize(samples)
+
+
+def _apply(engine: QuoridorEngine, move: int) -> bool:
+    """Play an encoded move through the engine's public API for the side to move."""
+    player_id = str(engine.game.current_player_id)
+    if is_fence_move(move):
+        orientation, x, y = decode_fence(move)
+        return engine.place_fence(player_id, x, y, orientation)
+    x, y = coords(move)
+    return engine.move_pawn(player_id, x, y)
+
+
+def _bench_move_pawn(iterations: int) -> dict:
+    """Pawns stepping back and forth from their starting squares."""
+    engine = QuoridorEngine(Game.objects.create(status='IN_PROGRESS').id)
+    shuttle = [('player1', 4, 1), ('player2', 4, 7), ('player1', 4, 0), ('player2', 4, 8)]
+    return _time_each(
+        lambda step=shuttle[i % len(shuttle)]: engine.move_pawn(*step)
+        for i in range(iterations)
+    )
+
+
+def _bench_place_fence(iterations: int) -> dict:
+    """Fences from the seeded game, on a fresh game whenever the supply runs out."""
+    fences = [decode_fence(move) for move in seeded_game(1, 400) if is_fence_move(move)]
+    samples = []
+    engine = None
+    placed = 0
+    while len(samples) < iterations:
+        if engine is None or placed == len(fences) or placed == 20:
+            engine = QuoridorEngine(Game.objects.create(status='IN_PROGRESS').id)
+            placed = 0
+        orientation, x, y = fences[placed]
+        player_id = str(engine.game.current_player_id)
+        started = time.perf_counter_ns()
+        engine.place_fence(player_id, x, y, orientation)
+        samples.append(time.perf_counter_ns() - started)
+        placed += 1
+    return _summarize(samples)
+
+
+def _bench_get_state(iterations: int, moves: List[int]) -> dict:
+    """Serializing a late-game engine state."""
+    engine = QuoridorEngine(Game.objects.create(status='IN_PROGRESS').id)
+    for move in moves:
+        _apply(engine, move)
+    return _time_each(engine.get_state for _ in range(iterations))
+
+
+def _bench_replay(iterations: int, moves: List[int]) -> dict:
+    """Loading a fresh engine and replaying the seeded game through it."""
+    def replay():
+        engine = QuoridorEngine(Game.objects.create(status='IN_PROGRESS').id)
+        for move in moves:
+            _apply(engine, move)
+    return _time_each(replay for _ in range(iterations))
+
+
+def run_benchmarks(iterations: int = 1000, seed: int = 0) -> dict:
+    """
+    Run the engine microbenchmarks and return the results as a dict.
+
+    Database-backed benchmarks run inside a transaction that is rolled back.
+    """
+    moves = seeded_game(seed)
+    positions = seeded_positions(moves)
+    replay_iterations = max(1, iterations // 100)
+
+    results = {
+        'path_exists': _time_each(
+            positions[i % len(positions)].paths_exist for i in range(iterations)
+        ),
+        'legal_moves': _time_each(
+            (lambda p=positions[i % len(positions)]: p.legal_moves(p.to_move))
+            for i in range(iterations)
+        ),
+    }
+
+    with transaction.atomic():
+        results['move_pawn'] = _bench_move_pawn(iterations)
+        results['place_fence'] = _bench_place_fence(iterations)
+        results['get_state'] = _bench_get_state(iterations, moves)
+        results['game_replay'] = _bench_replay(replay_iterations, moves)
+        transaction.set_rollback(True)
+
+    return {
+        'meta': {
+            'created_at': datetime.now(timezone.utc).isoformat(),
+            'python': platform.python_version(),
+            'machine': platform.machine(),
+            'iterations': iterations,
+            'seed': seed,
+            'replay_plies': len(moves),
+        },
+        'results': results,
+    }
+
+
+def compare(baseline: dict, current: dict, threshold: float = 0.1) -> Dict[str, Optional[dict]]:
+    """
+    Per-benchmark throughput change between two runs.
+
+    A benchmark is a regression when its ops/sec dropped by more than
+    threshold (as a fraction). Benchmarks missing from the baseline map to None.
+    """
+    comparison = {}
+    for name, result in current['results'].items():
+        before = baseline.get('results', {}).get(name)
+        if before is None or not before['ops_per_sec']:
+            comparison[name] = None
+            continue
+        change = result['ops_per_sec'] / before['ops_per_sec'] - 1
+        comparison[name] = {
+            'change': change,
+            'regression': change < -threshold,
+        }
+    return comparison
@@ -0,0 +1,584 @@
+import random
+import struct
+from typing import Iterable, List, Optional, Tuple
+
+
+BOARD_SIZE = 9
+FENCE_GRID_SIZE = BOARD_SIZE - 1
+START_FENCES = 10
+
+# Player indices used throughout the position type. Player 1 starts on the
+# bottom row and races to the top; player 2 does the opposite.
+PLAYER_ONE = 0
+PLAYER_TWO = 1
+
+GOAL_ROWS = {'TOP': BOARD_SIZE - 1, 'BOTTOM': 0}
+
+
+# Edge bits for the per-cell wall table, one per step direction. A set bit
+# means the step out of that cell is blocked by a fence or the board edge.
+UP, RIGHT, DOWN, LEFT = 1, 2, 4, 8
+STEP_BITS = {BOARD_SIZE: UP, 1: RIGHT, -BOARD_SIZE: DOWN, -1: LEFT}
+
+
+def square(x: int, y: int) -> int:
+    """Pack board coordinates into a square index."""
+    return y * BOARD_SIZE + x
+
+
+def coords(sq: int) -> Tuple[int, int]:
+    """Unpack a square index into (x, y) board coordinates."""
+    return sq % BOARD_SIZE, sq // BOARD_SIZE
+
+
+def fence_bit(x: int, y: int) -> int:
+    """Bit for the fence slot anchored at (x, y) in a fence bitmask."""
+    return 1 << (y * FENCE_GRID_SIZE + x)
+
+
+FULL_FENCE_MASK = (1 << FENCE_GRID_SIZE * FENCE_GRID_SIZE) - 1
+_NOT_FIRST_FENCE_COLUMN = FULL_FENCE_MASK & ~sum(fence_bit(0, y) for y in range(FENCE_GRID_SIZE))
+_NOT_LAST_FENCE_COLUMN = FULL_FENCE_MASK & ~sum(
+    fence_bit(FENCE_GRID_SIZE - 1, y) for y in range(FENCE_GRID_SIZE)
+)
+
+# Fence orientations: horizontal and vertical.
+ORIENTATIONS = ('H', 'V')
+
+# Moves are plain ints: a pawn move is its destination square, a fence move
+# is FENCE_MOVE_BASE plus its slot (horizontal slots first, then vertical).
+FENCE_MOVE_BASE = BOARD_SIZE * BOARD_SIZE
+FENCE_SLOTS = FENCE_GRID_SIZE * FENCE_GRID_SIZE
+
+
+def fence_move(orientation: str, x: int, y: int) -> int:
+    """Encode a fence placement as a move."""
+    offset = 0 if orientation == 'H' else FENCE_SLOTS
+    return FENCE_MOVE_BASE + offset + y * FENCE_GRID_SIZE + x
+
+
+def decode_fence(move: int) -> Tuple[str, int, int]:
+    """Decode a fence move into (orientation, x, y)."""
+    slot = move - FENCE_MOVE_BASE
+    orientation = 'H' if slot < FENCE_SLOTS else 'V'
+    y, x = divmod(slot % FENCE_SLOTS, FENCE_GRID_SIZE)
+    return orientation, x, y
+
+
+def is_fence_move(move: int) -> bool:
+    """Check if a move places a fence rather than moving a pawn."""
+    return move >= FENCE_MOVE_BASE
+
+
+def _border_walls(sq: int) -> int:
+    """Edge bits a cell gets from the board boundary alone."""
+    x, y = coords(sq)
+    return (
+        (UP if y == BOARD_SIZE - 1 else 0) |
+        (RIGHT if x == BOARD_SIZE - 1 else 0) |
+        (DOWN if y == 0 else 0) |
+        (LEFT if x == 0 else 0)
+    )
+
+
+BORDER_WALLS = tuple(_border_walls(sq) for sq in range(BOARD_SIZE * BOARD_SIZE))
+
+# (edge bit, neighbour square) for every on-board step out of each cell.
+NEIGHBOURS = tuple(
+    tuple(
+        (bit, sq + delta)
+        for delta, bit in STEP_BITS.items()
+        if not BORDER_WALLS[sq] & bit
+    )
+    for sq in range(BOARD_SIZE * BOARD_SIZE)
+)
+
+
+# Fences are segments on the (BOARD_SIZE + 1)^2 lattice of cell corners. All
+# corners on the board edge share the BORDER root in a position's wall sets.
+CORNER_GRID_SIZE = BOARD_SIZE + 1
+BORDER = CORNER_GRID_SIZE * CORNER_GRID_SIZE
+
+INITIAL_WALL_SETS = tuple(
+    BORDER if i in (0, BOARD_SIZE) or j in (0, BOARD_SIZE) else j * CORNER_GRID_SIZE + i
+    for j in range(CORNER_GRID_SIZE)
+    for i in range(CORNER_GRID_SIZE)
+) + (BORDER,)
+
+
+def fence_corners(orientation: str, x: int, y: int) -> Tuple[int, int, int]:
+    """Lattice corners (start, middle, end) covered by the fence at (x, y)."""
+    if orientation == 'H':
+        start = (y + 1) * CORNER_GRID_SIZE + x
+        return start, start + 1, start + 2
+    start = y * CORNER_GRID_SIZE + x + 1
+    return start, start + CORNER_GRID_SIZE, start + 2 * CORNER_GRID_SIZE
+
+
+def _zobrist_table(rng: random.Random, *shape: int):
+    """Nested lists of random 64-bit keys with the given shape."""
+    if len(shape) == 1:
+        return tuple(rng.getrandbits(64) for _ in range(shape[0]))
+    return tuple(_zobrist_table(rng, *shape[1:]) for _ in range(shape[0]))
+
+
+# Zobrist keys come from a fixed seed so position keys are stable across
+# processes and can be stored alongside finished games.
+_zobrist_rng = random.Random(0x51D0)
+ZOBRIST_PAWNS = _zobrist_table(_zobrist_rng, 2, BOARD_SIZE * BOARD_SIZE)
+ZOBRIST_FENCES = _zobrist_table(_zobrist_rng, 2, FENCE_SLOTS)
+ZOBRIST_FENCES_LEFT = _zobrist_table(_zobrist_rng, 2, START_FENCES + 1)
+ZOBRIST_SIDE = _zobrist_rng.getrandbits(64)
+
+
+# Wire format of Position.to_bytes: format version, both pawn squares, the
+# H and V fence masks, fences left for each player and the side to move.
+POSITION_FORMAT = struct.Struct('<BBBQQBBB')
+POSITION_FORMAT_VERSION = 1
+POSITION_BYTES = POSITION_FORMAT.size
+
+
+def set_bits(mask: int):
+    """Yield the index of every set bit in mask, lowest first."""
+    while mask:
+        low = mask & -mask
+        yield low.bit_length() - 1
+        mask ^= low
+
+
+def _fence_masks_valid(h_fences: int, v_fences: int) -> bool:
+    """Check that no two fences overlap or cross, as free_fence_slots would have ensured."""
+    return not (
+        h_fences & v_fences or
+        h_fences & (h_fences << 1 & _NOT_FIRST_FENCE_COLUMN) or
+        v_fences & (v_fences << FENCE_GRID_SIZE)
+    )
+
+
+class Position:
+    """
+    Compact, ORM-free Quoridor position.
+
+    Pawns are stored as square indices and placed fences as two 64-bit masks
+    (one bit per anchor point for each orientation), so copying a position
+    or testing a rule never touches the database. ``walls`` mirrors the
+    fence masks as an 81-entry table of blocked edge bits per cell and is
+    kept in step by ``add_fence``/``remove_fence``.
+
+    ``wall_sets`` is a union-find forest over fence corners (with the board
+    edge as one node). A new fence can only cut a path if it closes a loop
+    in that forest, which lets most fences skip the path search entirely.
+
+    ``key`` is a Zobrist hash of pawns, fences, fences left and side to move.
+    It is updated incrementally, so pawns, fence counts and the side to move
+    must be changed through ``move_pawn``, ``use_fence`` and ``set_to_move``.
+    """
+
+    __slots__ = (
+        'pawns', 'goal_rows', 'fences_left', 'h_fences', 'v_fences', 'to_move',
+        'walls', 'wall_sets', 'key'
+    )
+
+    def __init__(
+        self,
+        pawns: Iterable[int] = (square(4, 0), square(4, BOARD_SIZE - 1)),
+        goal_rows: Iterable[int] = (BOARD_SIZE - 1, 0),
+        fences_left: Iterable[int] = (START_FENCES, START_FENCES),
+        h_fences: int = 0,
+        v_fences: int = 0,
+        to_move: int = PLAYER_ONE,
+    ):
+        self.pawns = list(pawns)
+        self.goal_rows = tuple(goal_rows)
+        self.fences_left = list(fences_left)
+        self.h_fences = h_fences
+        self.v_fences = v_fences
+        self.to_move = to_move
+        self.walls = [self._cell_walls(sq) for sq in range(BOARD_SIZE * BOARD_SIZE)]
+        self._rebuild_wall_sets()
+        self.key = self._compute_key()
+
+    def copy(self) -> 'Position':
+        """Return an independent copy of this position."""
+        clone = Position.__new__(Position)
+        clone.pawns = list(self.pawns)
+        clone.goal_rows = self.goal_rows
+        clone.fences_left = list(self.fences_left)
+        clone.h_fences = self.h_fences
+        clone.v_fences = self.v_fences
+        clone.to_move = self.to_move
+        clone.walls = list(self.walls)
+        clone.wall_sets = list(self.wall_sets)
+        clone.key = self.key
+        return clone
+
+    def to_bytes(self) -> bytes:
+        """Canonical fixed-size (POSITION_BYTES) binary encoding of the position."""
+        return POSITION_FORMAT.pack(
+            POSITION_FORMAT_VERSION, self.pawns[0], self.pawns[1],
+            self.h_fences, self.v_fences,
+            self.fences_left[0], self.fences_left[1], self.to_move
+        )
+
+    @classmethod
+    def from_bytes(cls, data: bytes, goal_rows: Iterable[int] = (BOARD_SIZE - 1, 0)) -> 'Position':
+        """Decode ``to_bytes`` output, raising ValueError if it is malformed."""
+        try:
+            version, pawn1, pawn2, h_fences, v_fences, left1, left2, to_move = \
+                POSITION_FORMAT.unpack(bytes(data))
+        except struct.error as e:
+            raise ValueError(f"Expected {POSITION_BYTES} bytes, got {len(data)}") from e
+        if version != POSITION_FORMAT_VERSION:
+            raise ValueError(f"Unknown position format version {version}")
+        if (max(pawn1, pawn2) >= BOARD_SIZE * BOARD_SIZE or pawn1 == pawn2 or
+                max(left1, left2) > START_FENCES or to_move not in (PLAYER_ONE, PLAYER_TWO)):
+            raise ValueError("Position fields out of range")
+        if not _fence_masks_valid(h_fences, v_fences):
+            raise ValueError("Fences overlap or cross")
+        position = cls(
+            pawns=(pawn1, pawn2),
+            goal_rows=goal_rows,
+            fences_left=(left1, left2),
+            h_fences=h_fences,
+            v_fences=v_fences,
+            to_move=to_move
+        )
+        if not position.paths_exist():
+            raise ValueError("Fences cut a player off from their goal")
+        return position
+
+    def _compute_key(self) -> int:
+        """Zobrist hash of the position, computed from scratch."""
+        key = ZOBRIST_SIDE if self.to_move == PLAYER_TWO else 0
+        for player in (PLAYER_ONE, PLAYER_TWO):
+            key ^= ZOBRIST_PAWNS[player][self.pawns[player]]
+            key ^= ZOBRIST_FENCES_LEFT[player][self.fences_left[player]]
+        for index, mask in enumerate((self.h_fences, self.v_fences)):
+            for slot in set_bits(mask):
+                key ^= ZOBRIST_FENCES[index][slot]
+        return key
+
+    def move_pawn(self, player: int, sq: int) -> None:
+        """Put the player's pawn on sq; legality is the caller's concern."""
+        pawn_keys = ZOBRIST_PAWNS[player]
+        self.key ^= pawn_keys[self.pawns[player]] ^ pawn_keys[sq]
+        self.pawns[player] = sq
+
+    def use_fence(self, player: int) -> None:
+        """Take one fence from the player's supply."""
+        left = self.fences_left[player]
+        self.key ^= ZOBRIST_FENCES_LEFT[player][left] ^ ZOBRIST_FENCES_LEFT[player][left - 1]
+        self.fences_left[player] = left - 1
+
+    def set_to_move(self, player: int) -> None:
+        """Set the side to move."""
+        if player != self.to_move:
+            self.key ^= ZOBRIST_SIDE
+            self.to_move = player
+
+    def has_fence(self, orientation: str, x: int, y: int) -> bool:
+        """Check if a fence is anchored at (x, y) with the given orientation."""
+        if not (0 <= x < FENCE_GRID_SIZE and 0 <= y < FENCE_GRID_SIZE):
+            return False
+        mask = self.h_fences if orientation == 'H' else self.v_fences
+        return bool(mask & fence_bit(x, y))
+
+    def add_fence(self, orientation: str, x: int, y: int) -> None:
+        """Set the fence bit for (x, y); legality, apart from the orientation, is the caller's concern."""
+        walls = self.walls
+        sq = square(x, y)
+        if orientation == 'H':
+            self.h_fences |= fence_bit(x, y)
+            walls[sq] |= UP
+            walls[sq + 1] |= UP
+            walls[sq + BOARD_SIZE] |= DOWN
+            walls[sq + BOARD_SIZE + 1] |= DOWN
+        elif orientation == 'V':
+            self.v_fences |= fence_bit(x, y)
+            walls[sq] |= RIGHT
+            walls[sq + BOARD_SIZE] |= RIGHT
+            walls[sq + 1] |= LEFT
+            walls[sq + BOARD_SIZE + 1] |= LEFT
+        else:
+            raise ValueError(f"Unknown fence orientation {orientation!r}")
+        self.key ^= ZOBRIST_FENCES[orientation != 'H'][y * FENCE_GRID_SIZE + x]
+
+        start, middle, end = fence_corners(orientation, x, y)
+        root = self._find(start)
+        self.wall_sets[self._find(middle)] = root
+        self.wall_sets[self._find(end)] = root
+
+    def remove_fence(self, orientation: str, x: int, y: int) -> None:
+        """Clear the fence bit for (x, y)."""
+        self.key ^= ZOBRIST_FENCES[orientation != 'H'][y * FENCE_GRID_SIZE + x]
+        if orientation == 'H':
+            self.h_fences &= ~fence_bit(x, y)
+        else:
+            self.v_fences &= ~fence_bit(x, y)
+
+        # Another fence may share one of the edges, so rebuild the touched
+        # cells from the masks rather than clearing bits blindly.
+        sq = square(x, y)
+        for cell in (sq, sq + 1, sq + BOARD_SIZE, sq + BOARD_SIZE + 1):
+            self.walls[cell] = self._cell_walls(cell)
+        self._rebuild_wall_sets()
+
+    def _find(self, corner: int) -> int:
+        """Union-find root of a fence corner, halving the path as it goes."""
+        parents = self.wall_sets
+        while parents[corner] != corner:
+            parents[corner] = parents[parents[corner]]
+            corner = parents[corner]
+        return corner
+
+    def _rebuild_wall_sets(self) -> None:
+        """Recompute the wall union-find from the fence masks."""
+        self.wall_sets = list(INITIAL_WALL_SETS)
+        for orientation, mask in (('H', self.h_fences), ('V', self.v_fences)):
+            for bit in set_bits(mask):
+                y, x = divmod(bit, FENCE_GRID_SIZE)
+                start, middle, end = fence_corners(orientation, x, y)
+                root = self._find(start)
+                self.wall_sets[self._find(middle)] = root
+                self.wall_sets[self._find(end)] = root
+
+    def fence_may_disconnect(self, orientation: str, x: int, y: int) -> bool:
+        """
+        Check if adding the fence could cut a pawn off from its goal.
+
+        A fence only encloses a region when two of its corners already belong
+        to the same wall (or both touch the board edge); otherwise every path
+        survives and no search is needed.
+        """
+        start, middle, end = fence_corners(orientation, x, y)
+        start_root = self._find(start)
+        middle_root = self._find(middle)
+        end_root = self._find(end)
+        return start_root == middle_root or start_root == end_root or middle_root == end_root
+
+    def _cell_walls(self, sq: int) -> int:
+        """Compute a cell's edge bits from the border and the fence masks."""
+        x, y = coords(sq)
+        walls = BORDER_WALLS[sq]
+        if self.has_fence('H', x, y) or self.has_fence('H', x - 1, y):
+            walls |= UP
+        if self.has_fence('H', x, y - 1) or self.has_fence('H', x - 1, y - 1):
+            walls |= DOWN
+        if self.has_fence('V', x, y) or self.has_fence('V', x, y - 1):
+            walls |= RIGHT
+        if self.has_fence('V', x - 1, y) or self.has_fence('V', x - 1, y - 1):
+            walls |= LEFT
+        return walls
+
+    def is_blocked(self, from_sq: int, to_sq: int) -> bool:
+        """Check if a single orthogonal step between two squares crosses a fence."""
+        return bool(self.walls[from_sq] & STEP_BITS[to_sq - from_sq])
+
+    def is_goal(self, player: int) -> bool:
+        """Check if the player's pawn stands on its goal row."""
+        return self.pawns[player] // BOARD_SIZE == self.goal_rows[player]
+
+    def path_exists(self, player: int) -> bool:
+        """BFS from the player's pawn to its goal row, ignoring pawns."""
+        start = self.pawns[player]
+        goal_row = self.goal_rows[player]
+        if start // BOARD_SIZE == goal_row:
+            return True
+
+        walls = self.walls
+        visited = 1 << start
+        frontier = [start]
+        for sq in frontier:
+            blocked = walls[sq]
+            for bit, nsq in NEIGHBOURS[sq]:
+                if blocked & bit or visited >> nsq & 1:
+                    continue
+                if nsq // BOARD_SIZE == goal_row:
+                    return True
+                visited |= 1 << nsq
+                frontier.append(nsq)
+
+        return False
+
+    def distance(self, player: int) -> Optional[int]:
+        """Number of steps to the player's goal row ignoring pawns, or None if cut off."""
+        start = self.pawns[player]
+        goal_row = self.goal_rows[player]
+        if start // BOARD_SIZE == goal_row:
+            return 0
+
+        walls = self.walls
+        visited = 1 << start
+        frontier = [start]
+        steps = 0
+        while frontier:
+            steps += 1
+            next_frontier = []
+            for sq in frontier:
+                blocked = walls[sq]
+                for bit, nsq in NEIGHBOURS[sq]:
+                    if blocked & bit or visited >> nsq & 1:
+                        continue
+                    if nsq // BOARD_SIZE == goal_row:
+                        return steps
+                    visited |= 1 << nsq
+                    next_frontier.append(nsq)
+            frontier = next_frontier
+
+        return None
+
+    def paths_exist(self) -> bool:
+        """Check that both players still have a route to their goal rows."""
+        return self.path_exists(PLAYER_ONE) and self.path_exists(PLAYER_TWO)
+
+    def shortest_path(self, player: int) -> Optional[List[int]]:
+        """Squares on one shortest route to the player's goal row, or None."""
+        start = self.pawns[player]
+        goal_row = self.goal_rows[player]
+        walls = self.walls
+        parents = {start: start}
+        frontier = [start]
+        for sq in frontier:
+            if sq // BOARD_SIZE == goal_row:
+                path = [sq]
+                while sq != start:
+                    sq = parents[sq]
+                    path.append(sq)
+                path.reverse()
+                return path
+            blocked = walls[sq]
+            for bit, nsq in NEIGHBOURS[sq]:
+                if not blocked & bit and nsq not in parents:
+                    parents[nsq] = sq
+                    frontier.append(nsq)
+        return None
+
+    def pawn_moves(self, player: int) -> List[int]:
+        """Destination squares for the player's pawn, jumps included."""
+        walls = self.walls
+        current = self.pawns[player]
+        opponent = self.pawns[1 - player]
+        moves = []
+        for bit, nsq in NEIGHBOURS[current]:
+            if walls[current] & bit:
+                continue
+            if nsq != opponent:
+                moves.append(nsq)
+            elif not walls[opponent] & bit:
+                moves.append(opponent + (opponent - current))
+            else:
+                # Straight jump is blocked: sidestep diagonally around the opponent.
+                for side_bit, side_sq in NEIGHBOURS[opponent]:
+                    if side_sq != current and not walls[opponent] & side_bit:
+                        moves.append(side_sq)
+        return moves
+
+    def free_fence_slots(self) -> Tuple[int, int]:
+        """H and V slot masks that neither overlap nor cross a placed fence."""
+        h, v = self.h_fences, self.v_fences
+        taken_h = h | (h << 1 & _NOT_FIRST_FENCE_COLUMN) | (h >> 1 & _NOT_LAST_FENCE_COLUMN) | v
+        taken_v = v | (v << FENCE_GRID_SIZE) | (v >> FENCE_GRID_SIZE) | h
+        return FULL_FENCE_MASK & ~taken_h, FULL_FENCE_MASK & ~taken_v
+
+    def is_fence_legal(self, player: int, orientation: str, x: int, y: int) -> bool:
+        """Check orientation, fence count, bounds, overlap, crossing and path preservation."""
+        if orientation not in ORIENTATIONS:
+            return False
+        if self.fences_left[player] <= 0:
+            return False
+        if not (0 <= x < FENCE_GRID_SIZE and 0 <= y < FENCE_GRID_SIZE):
+            return False
+        free_h, free_v = self.free_fence_slots()
+        if not (free_h if orientation == 'H' else free_v) & fence_bit(x, y):
+            return False
+        return not self.fence_may_disconnect(orientation, x, y) or self._fence_keeps_paths(orientation, x, y)
+
+    def _fence_keeps_paths(self, orientation: str, x: int, y: int) -> bool:
+        """Search both paths on a copy with the fence added."""
+        trial = self.copy()
+        trial.add_fence(orientation, x, y)
+        return trial.paths_exist()
+
+    def _path_crossings(self) -> List[Tuple[int, int]]:
+        """Per player, square masks of vertical and horizontal steps on a shortest path."""
+        crossings = []
+        for player in (PLAYER_ONE, PLAYER_TWO):
+            path = self.shortest_path(player)
+            if path is None:
+                crossings.append((-1, -1))
+                continue
+            vertical = horizontal = 0
+            for a, b in zip(path, path[1:]):
+                low = min(a, b)
+                if abs(a - b) == BOARD_SIZE:
+                    vertical |= 1 << low
+                else:
+                    horizontal |= 1 << low
+            crossings.append((vertical, horizontal))
+        return crossings
+
+    def fence_moves(self, player: int) -> List[int]:
+        """
+        All legal fence moves for the player.
+
+        Overlap and crossing are resolved for every slot at once with mask
+        arithmetic. A slot then needs a path search only if it could close a
+        loop and it cuts one of the players' current shortest paths.
+        """
+        if self.fences_left[player] <= 0:
+            return []
+        free_h, free_v = self.free_fence_slots()
+        crossings = None
+        moves = []
+        for orientation, free, step in (('H', free_h, 1), ('V', free_v, BOARD_SIZE)):
+            for slot in set_bits(free):
+                y, x = divmod(slot, FENCE_GRID_SIZE)
+                move = fence_move(orientation, x, y)
+                if not self.fence_may_disconnect(orientation, x, y):
+                    moves.append(move)
+                    continue
+                if crossings is None:
+                    crossings = self._path_crossings()
+                sq = square(x, y)
+                edges = 1 << sq | 1 << (sq + step)
+                index = 0 if orientation == 'H' else 1
+                if not any(crossing[index] & edges for crossing in crossings):
+                    moves.append(move)
+                elif self._fence_keeps_paths(orientation, x, y):
+                    moves.append(move)
+        return moves
+
+    def blocking_fences(self, player: int) -> List[int]:
+        """Legal fence moves for the player that cut a step on the opponent's shortest path."""
+        if self.fences_left[player] <= 0:
+            return []
+        path = self.shortest_path(1 - player)
+        if not path:
+            return []
+
+        candidates = []
+        for a, b in zip(path, path[1:]):
+            x, y = coords(min(a, b))
+            if abs(a - b) == BOARD_SIZE:
+                slots = (('H', x, y), ('H', x - 1, y))
+            else:
+                slots = (('V', x, y), ('V', x, y - 1))
+            for orientation, fx, fy in slots:
+                move = fence_move(orientation, fx, fy)
+                if move not in candidates and self.is_fence_legal(player, orientation, fx, fy):
+                    candidates.append(move)
+        return candidates
+
+    def legal_moves(self, player: int) -> List[int]:
+        """Every legal pawn and fence move for the player."""
+        return self.pawn_moves(player) + self.fence_moves(player)
+
+    def play(self, move: int) -> None:
+        """Apply a move for the side to move and pass the turn; no legality check."""
+        player = self.to_move
+        if is_fence_move(move):
+            self.add_fence(*decode_fence(move))
+            self.use_fence(player)
+        else:
+            self.move_pawn(player, move)
+        self.set_to_move(1 - player)
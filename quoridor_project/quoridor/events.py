@@ -0,0 +1,106 @@
+import asyncio
+import json
+import threading
+from collections import defaultdict
+from typing import AsyncIterator, Dict, Optional, Tuple
+
+# Comment frame sent on idle streams so proxies and clients keep them open.
+KEEPALIVE_SECONDS = 15
+
+
+class _Subscriber:
+    """One open stream: an event on its own loop, set whenever its game changes."""
+
+    def __init__(self):
+        self.loop = asyncio.get_running_loop()
+        self.changed = asyncio.Event()
+
+    def notify(self) -> None:
+        try:
+            self.loop.call_soon_threadsafe(self.changed.set)
+        except RuntimeError:
+            # The loop has closed; its stream is gone too.
+            pass
+
+
+class GameEventBroker:
+    """
+    Fans committed game states out to server-sent event streams.
+
+    Only the latest state of each game is kept, encoded once and shared by
+    every subscriber. A subscriber that falls behind skips straight to the
+    newest version instead of replaying the ones in between, since each
+    event carries the full state. Publishing is thread-safe, so moves
+    committed on request, bot or scheduler threads all reach async streams.
+    """
+
+    def __init__(self):
+        self._latest: Dict[int, Tuple[int, str]] = {}
+        self._subscribers = defaultdict(set)
+        self._lock = threading.Lock()
+
+    def publish(self, game_id: int, version: int, state: dict) -> None:
+        """Record a game's state at version and wake its subscribers."""
+        if not self._is_newer(game_id, version):
+            return
+        payload = json.dumps(state, separators=(',', ':'))
+        with self._lock:
+            if not self._is_newer(game_id, version):
+                return
+            self._latest[game_id] = (version, payload)
+            subscribers = list(self._subscribers.get(game_id, ()))
+        for subscriber in subscribers:
+            subscriber.notify()
+
+    def _is_newer(self, game_id: int, version: int) -> bool:
+        current = self._latest.get(game_id)
+        return current is None or version > current[0]
+
+    def latest(self, game_id: int) -> Optional[Tuple[int, str]]:
+        """(version, encoded state) last published for a game, if any."""
+        with self._lock:
+            return self._latest.get(game_id)
+
+    def forget(self, game_id: int) -> None:
+        """Drop a game's cached state once its engine is no longer live."""
+        with self._lock:
+            self._latest.pop(game_id, None)
+
+    def clear(self) -> None:
+        """Drop every cached state."""
+        with self._lock:
+            self._latest.clear()
+
+    def subscriber_count(self, game_id: int) -> int:
+        with self._lock:
+            return len(self._subscribers.get(game_id, ()))
+
+    async def stream(self, game_id: int, since: int = -1) -> AsyncIterator[str]:
+        """
+        Yield SSE frames for every version of the game newer than since.
+
+        The game's current state must have been published first; it is sent
+        straight away when the client has not seen it yet.
+        """
+        subscriber = _Subscriber()
+        with self._lock:
+            self._subscribers[game_id].add(subscriber)
+        try:
+            while True:
+                latest = self.latest(game_id)
+                if latest is not None and latest[0] > since:
+                    since, payload = latest
+                    yield f"id: {since}\nevent: state\ndata: {payload}\n\n"
+                try:
+                    await asyncio.wait_for(subscriber.changed.wait(), KEEPALIVE_SECONDS)
+                except asyncio.TimeoutError:
+                    yield ": keepalive\n\n"
+                subscriber.changed.clear()
+        finally:
+            with self._lock:
+                self._subscribers[game_id].discard(subscriber)
+                if not self._subscribers[game_id]:
+                    del self._subscribers[game_id]
+
+
+game_events = GameEventBroker()
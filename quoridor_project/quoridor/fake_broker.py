@@ -0,0 +1,247 @@
+"""
+In-process stand-in for the MQTT broker, for tests and benchmarks.
+
+``InMemoryClient`` implements the part of ``paho.mqtt.client.Client`` that
+the server publisher and the device service use, so either side can be
+pointed at an ``InMemoryBroker`` instead of the real one, e.g. with
+``MQTT_CONFIG['CLIENT_FACTORY'] = 'quoridor.fake_broker.InMemoryClient'``.
+Like paho, callbacks run on whichever thread drives the client's network
+loop (``loop``, ``loop_start`` or ``loop_forever``).
+"""
+import itertools
+import queue
+import threading
+from collections import defaultdict
+from typing import Dict, List, Optional
+
+import paho.mqtt.client as mqtt_client
+
+
+def _to_bytes(payload) -> bytes:
+    """Normalize a payload the way paho does."""
+    if payload is None:
+        return b''
+    if isinstance(payload, (bytes, bytearray)):
+        return bytes(payload)
+    if isinstance(payload, str):
+        return payload.encode('utf-8')
+    return str(payload).encode('ascii')
+
+
+class InMemoryBroker:
+    """
+    Routes messages between in-process clients.
+
+    Supports ``+``/``#`` wildcard subscriptions, retained messages (an empty
+    retained payload clears the topic) and QoS 0/1. Delivery uses the lower
+    of the publish and subscription QoS. A client that connected with
+    ``clean_session=False`` keeps its subscriptions across disconnects, and
+    QoS 1 messages for it are held until it reconnects.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._mids = itertools.count(1)
+        self._retained: Dict[str, tuple] = {}
+        self._subscriptions: Dict[str, Dict[str, int]] = defaultdict(dict)
+        self._online: Dict[str, 'InMemoryClient'] = {}
+        self._offline_queues: Dict[str, List[tuple]] = {}
+        self.published = 0
+
+    def connect(self, client: 'InMemoryClient') -> None:
+        with self._lock:
+            if client.clean_session:
+                self._subscriptions.pop(client.client_id, None)
+                self._offline_queues.pop(client.client_id, None)
+            self._online[client.client_id] = client
+            held = self._offline_queues.pop(client.client_id, [])
+        client._deliver(('connack', 0))
+        for message in held:
+            client._deliver(('message', message))
+
+    def disconnect(self, client: 'InMemoryClient') -> None:
+        with self._lock:
+            if self._online.get(client.client_id) is client:
+                del self._online[client.client_id]
+            if client.clean_session:
+                self._subscriptions.pop(client.client_id, None)
+            else:
+                self._offline_queues.setdefault(client.client_id, [])
+
+    def subscribe(self, client: 'InMemoryClient', topic: str, qos: int) -> None:
+        with self._lock:
+            self._subscriptions[client.client_id][topic] = qos
+            retained = [
+                (name, payload, min(qos, retained_qos), True)
+                for name, (payload, retained_qos) in self._retained.items()
+                if mqtt_client.topic_matches_sub(topic, name)
+            ]
+        for message in retained:
+            client._deliver(('message', message))
+
+    def unsubscribe(self, client: 'InMemoryClient', topic: str) -> None:
+        with self._lock:
+            self._subscriptions[client.client_id].pop(topic, None)
+
+    def publish(self, topic: str, payload: bytes, qos: int, retain: bool) -> int:
+        """Route a message to every matching subscription and return its mid."""
+        deliveries = []
+        with self._lock:
+            self.published += 1
+            if retain:
+                if payload:
+                    self._retained[topic] = (payload, qos)
+                else:
+                    self._retained.pop(topic, None)
+            for client_id, subscriptions in self._subscriptions.items():
+                granted = [sub_qos for sub, sub_qos in subscriptions.items()
+                           if mqtt_client.topic_matches_sub(sub, topic)]
+                if not granted:
+                    continue
+                message = (topic, payload, min(qos, max(granted)), False)
+                client = self._online.get(client_id)
+                if client is not None:
+                    deliveries.append((client, message))
+                elif message[2] > 0 and client_id in self._offline_queues:
+                    self._offline_queues[client_id].append(message)
+            mid = next(self._mids)
+        for client, message in deliveries:
+            client._deliver(('message', message))
+        return mid
+
+    def retained(self, topic: str) -> Optional[bytes]:
+        """Payload retained on a topic, if any."""
+        with self._lock:
+            entry = self._retained.get(topic)
+            return entry[0] if entry else None
+
+
+default_broker = InMemoryBroker()
+
+
+class InMemoryClient:
+    """Drop-in for the subset of paho's Client API used in this project."""
+
+    _client_ids = itertools.count(1)
+
+    def __init__(self, client_id: str = '', clean_session: Optional[bool] = None,
+                 userdata=None, protocol=mqtt_client.MQTTv311,
+                 broker: Optional[InMemoryBroker] = None, **kwargs):
+        self.client_id = client_id or f'in-memory-{next(self._client_ids)}'
+        self.clean_session = True if clean_session is None else clean_session
+        self._userdata = userdata
+        self._broker = broker or default_broker
+        self._inbox = queue.Queue()
+        self._callbacks = {}
+        self._connected = False
+        self._loop_thread = None
+        self._stop_loop = threading.Event()
+        self.on_connect = None
+        self.on_disconnect = None
+        self.on_message = None
+
+    def connect(self, host: str = 'localhost', port: int = 1883, keepalive: int = 60, **kwargs) -> int:
+        self._connected = True
+        self._broker.connect(self)
+        return mqtt_client.MQTT_ERR_SUCCESS
+
+    def reconnect(self) -> int:
+        return self.connect()
+
+    def disconnect(self, *args, **kwargs) -> int:
+        if self._connected:
+            self._connected = False
+            self._broker.disconnect(self)
+            self._deliver(('disconnect', 0))
+        return mqtt_client.MQTT_ERR_SUCCESS
+
+    def is_connected(self) -> bool:
+        return self._connected
+
+    def subscribe(self, topic, qos: int = 0):
+        topics = topic if isinstance(topic, list) else [(topic, qos)]
+        for name, sub_qos in topics:
+            self._broker.subscribe(self, name, sub_qos)
+        return mqtt_client.MQTT_ERR_SUCCESS, 1
+
+    def unsubscribe(self, topic):
+        for name in topic if isinstance(topic, list) else [topic]:
+            self._broker.unsubscribe(self, name)
+        return mqtt_client.MQTT_ERR_SUCCESS, 1
+
+    def message_callback_add(self, sub: str, callback) -> None:
+        self._callbacks[sub] = callback
+
+    def message_callback_remove(self, sub: str) -> None:
+        self._callbacks.pop(sub, None)
+
+    def publish(self, topic: str, payload=None, qos: int = 0, retain: bool = False, properties=None):
+        if not self._connected:
+            info = mqtt_client.MQTTMessageInfo(0)
+            info.rc = mqtt_client.MQTT_ERR_NO_CONN
+            return info
+        info = mqtt_client.MQTTMessageInfo(
+            self._broker.publish(topic, _to_bytes(payload), qos, retain)
+        )
+        info.rc = mqtt_client.MQTT_ERR_SUCCESS
+        info._set_as_published()
+        return info
+
+    def _deliver(self, event: tuple) -> None:
+        self._inbox.put(event)
+
+    def loop(self, timeout: float = 1.0) -> int:
+        """Run callbacks for pending events, waiting up to timeout for the first."""
+        try:
+            event = self._inbox.get(timeout=timeout)
+        except queue.Empty:
+            event = None
+        while event is not None:
+            self._dispatch(event)
+            try:
+                event = self._inbox.get_nowait()
+            except queue.Empty:
+                event = None
+        return mqtt_client.MQTT_ERR_SUCCESS if self._connected else mqtt_client.MQTT_ERR_NO_CONN
+
+    def _dispatch(self, event: tuple) -> None:
+        kind, data = event
+        if kind == 'connack' and self.on_connect:
+            self.on_connect(self, self._userdata, {'session present': 0}, data)
+        elif kind == 'disconnect' and self.on_disconnect:
+            self.on_disconnect(self, self._userdata, data)
+        elif kind == 'message':
+            topic, payload, qos, retain = data
+            message = mqtt_client.MQTTMessage(topic=topic.encode('utf-8'))
+            message.payload = payload
+            message.qos = qos
+            message.retain = retain
+            matched = [callback for sub, callback in self._callbacks.items()
+                       if mqtt_client.topic_matches_sub(sub, topic)]
+            for callback in matched or ([self.on_message] if self.on_message else []):
+                callback(self, self._userdata, message)
+
+    def loop_forever(self, timeout: float = 1.0, **kwargs) -> int:
+        while self._connected and not self._stop_loop.is_set():
+            self.loop(timeout)
+        # Deliver the final disconnect callback, if any.
+        self.loop(0)
+        return mqtt_client.MQTT_ERR_SUCCESS
+
+    def loop_start(self) -> int:
+        if self._loop_thread is None:
+            self._stop_loop.clear()
+            self._loop_thread = threading.Thread(target=self._run_loop, name='in-memory-mqtt', daemon=True)
+            self._loop_thread.start()
+        return mqtt_client.MQTT_ERR_SUCCESS
+
+    def loop_stop(self) -> int:
+        if self._loop_thread is not None:
+            self._stop_loop.set()
+            self._loop_thread.join()
+            self._loop_thread = None
+        return mqtt_client.MQTT_ERR_SUCCESS
+
+    def _run_loop(self) -> None:
+        while not self._stop_loop.is_set():
+            self.loop(0.1)
@@ -0,0 +1,112 @@
+from typing import NamedTuple, Optional
+
+import numpy as np
+
+from .board import (
+    Position, BOARD_SIZE, FENCE_GRID_SIZE, FENCE_SLOTS, PLAYER_ONE, PLAYER_TWO,
+    UP, RIGHT, coords
+)
+
+UNREACHABLE = -1
+
+# Anything above the longest possible route works as "infinite" distance.
+_INFINITY = BOARD_SIZE * BOARD_SIZE + 1
+
+_SLOT_Y, _SLOT_X = np.divmod(np.arange(FENCE_SLOTS), FENCE_GRID_SIZE)
+_H = np.arange(FENCE_SLOTS)
+_V = _H + FENCE_SLOTS
+
+
+class FenceImpact(NamedTuple):
+    """
+    Result of evaluating every fence slot for one position.
+
+    ``legal`` has shape (2, 8, 8) indexed [orientation, y, x] with H first.
+    ``distances`` has shape (2, 2, 8, 8) indexed [player, orientation, y, x]
+    and holds each player's shortest path length after that fence, or
+    UNREACHABLE. ``baseline`` holds both players' current path lengths.
+    """
+    legal: np.ndarray
+    distances: np.ndarray
+    baseline: np.ndarray
+
+
+def _open_edges(position: Position):
+    """Boolean (9, 9) grids of steps that are open upwards and to the right."""
+    walls = np.array(position.walls).reshape(BOARD_SIZE, BOARD_SIZE)
+    return (walls & UP) == 0, (walls & RIGHT) == 0
+
+
+def _candidate_edges(open_up: np.ndarray, open_right: np.ndarray):
+    """Stack the open-edge grids once per fence slot with that fence added."""
+    batch = 2 * FENCE_SLOTS
+    up = np.repeat(open_up[np.newaxis], batch, axis=0)
+    right = np.repeat(open_right[np.newaxis], batch, axis=0)
+
+    up[_H, _SLOT_Y, _SLOT_X] = False
+    up[_H, _SLOT_Y, _SLOT_X + 1] = False
+    right[_V, _SLOT_Y, _SLOT_X] = False
+    right[_V, _SLOT_Y + 1, _SLOT_X] = False
+    return up, right
+
+
+def distance_maps(up: np.ndarray, right: np.ndarray, goal_row: int) -> np.ndarray:
+    """
+    Distance from every square to goal_row for a batch of boards.
+
+    ``up`` and ``right`` have shape (batch, 9, 9). All boards relax in
+    lock-step, one step of every route per iteration, until nothing changes.
+    """
+    dist = np.full(up.shape, _INFINITY, dtype=np.int16)
+    dist[:, goal_row, :] = 0
+    up_open = up[:, :-1, :]
+    right_open = right[:, :, :-1]
+
+    while True:
+        relaxed = dist.copy()
+        np.minimum(relaxed[:, :-1, :], np.where(up_open, dist[:, 1:, :] + 1, _INFINITY), out=relaxed[:, :-1, :])
+        np.minimum(relaxed[:, 1:, :], np.where(up_open, dist[:, :-1, :] + 1, _INFINITY), out=relaxed[:, 1:, :])
+        np.minimum(relaxed[:, :, :-1], np.where(right_open, dist[:, :, 1:] + 1, _INFINITY), out=relaxed[:, :, :-1])
+        np.minimum(relaxed[:, :, 1:], np.where(right_open, dist[:, :, :-1] + 1, _INFINITY), out=relaxed[:, :, 1:])
+        if np.array_equal(relaxed, dist):
+            return dist
+        dist = relaxed
+
+
+def evaluate_fences(position: Position, player: Optional[int] = None) -> FenceImpact:
+    """
+    Legality and resulting path lengths for all 2x8x8 fence slots at once.
+
+    ``player`` is the one placing the fence and defaults to the side to move.
+    """
+    if player is None:
+        player = position.to_move
+
+    open_up, open_right = _open_edges(position)
+    up, right = _candidate_edges(open_up, open_right)
+
+    distances = np.empty((2, 2 * FENCE_SLOTS), dtype=np.int16)
+    baseline = np.empty(2, dtype=np.int16)
+    for index in (PLAYER_ONE, PLAYER_TWO):
+        x, y = coords(position.pawns[index])
+        goal_row = position.goal_rows[index]
+        distances[index] = distance_maps(up, right, goal_row)[:, y, x]
+        baseline[index] = distance_maps(open_up[np.newaxis], open_right[np.newaxis], goal_row)[0, y, x]
+
+    reachable = (distances < _INFINITY).all(axis=0)
+    distances[distances >= _INFINITY] = UNREACHABLE
+    baseline[baseline >= _INFINITY] = UNREACHABLE
+
+    free_h, free_v = position.free_fence_slots()
+    slot_bits = 1 << np.arange(FENCE_SLOTS, dtype=np.uint64)
+    free = np.concatenate([
+        (np.uint64(free_h) & slot_bits) != 0,
+        (np.uint64(free_v) & slot_bits) != 0,
+    ])
+    legal = free & reachable & (position.fences_left[player] > 0)
+
+    return FenceImpact(
+        legal=legal.reshape(2, FENCE_GRID_SIZE, FENCE_GRID_SIZE),
+        distances=distances.reshape(2, 2, FENCE_GRID_SIZE, FENCE_GRID_SIZE),
+        baseline=baseline,
+    )
@@ -1,52 +1,201 @@
-from collections import deque
-from typing import Dict, Tuple, Optional
-from concurrent.futures import ThreadPoolExecutor, TimeoutError, as_completed
+from typing import Dict, Iterator, List, Tuple, Optional
 
-from .models import Game, PlayerState, Fence, Device
+from concurrent.futures import Future, ThreadPoolExecutor
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import IntegrityError, close_old_connections, transaction
+
+from .ai import BOTS
+from .events import game_events
+from .board import (
+    Position, GOAL_ROWS, ORIENTATIONS, PLAYER_ONE, PLAYER_TWO,
+    square, coords, fence_bit, decode_fence, is_fence_move
+)
+from .models import Game, PlayerState, Fence, Device, Move, GameSnapshot
 from .mqtt_publisher import QuoridorMQTTPublisher
+from .scheduler import turn_scheduler
 
 import time
 import threading
 import traceback
 
+# Bots think off the request thread; a couple of workers is plenty since
+# each game has at most one bot turn in flight.
+_bot_executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix='quoridor-bot')
+# Games with a bot turn queued or running, so loading an engine mid-turn
+# does not start a second one.
+_bot_turns_in_flight = set()
+_bot_turns_lock = threading.Lock()
+# Tries per bot turn before it is left for the next load to pick up.
+BOT_TURN_ATTEMPTS = 3
+
+
+class StaleGameError(Exception):
+    """The game was changed in the database by another engine instance."""
+
+
+def schedule_bot_turn(game_id: int, attempt: int = 1) -> Optional[Future]:
+    """Queue the bot's move for a game unless one is already queued or running."""
+    with _bot_turns_lock:
+        if game_id in _bot_turns_in_flight:
+            return None
+        _bot_turns_in_flight.add(game_id)
+    return _bot_executor.submit(_play_bot_turn, game_id, attempt)
+
+
+def _play_bot_turn(game_id: int, attempt: int) -> None:
+    """
+    Play the bot's move on the game's current engine (runs on a bot worker).
+
+    The engine is fetched from the registry rather than captured, so a move
+    committed by another engine since the turn was scheduled is seen. A
+    failed or rejected move is retried, up to BOT_TURN_ATTEMPTS times.
+    """
+    from .registry import engine_registry
+    played = False
+    try:
+        played = engine_registry.get(game_id)._play_bot_move()
+    except Exception:
+        # Nobody waits on the future: report the failure and drop the
+        # engine so the next request reloads the committed game.
+        traceback.print_exc()
+        engine_registry.discard(game_id)
+    finally:
+        with _bot_turns_lock:
+            _bot_turns_in_flight.discard(game_id)
+        close_old_connections()
+    if not played and attempt < BOT_TURN_ATTEMPTS:
+        schedule_bot_turn(game_id, attempt + 1)
+
 
 class QuoridorEngine:
     """Core game engine for Quoridor, handling game logic and state management."""
     
     BOARD_SIZE = 9
-    DIRECTIONS = [(0, 1), (1, 0), (0, -1), (-1, 0)]  
-    MAX_PATHFINDING_STEPS = 500
+    # Pause between a move's LED feedback and the turn-change colour.
+    TURN_TRANSITION_DELAY = 0.7
+    # Moves between snapshots; loading replays at most this many log entries.
+    SNAPSHOT_INTERVAL = 20
+    # Game columns a move can change; commits write only these.
+    GAME_STATE_FIELDS = ('current_player_id', 'status', 'winner_id', 'state_version', 'position')
 
     def __init__(self, game_id: int):
         """Initialize game engine with existing game state."""
-        self.game = Game.objects.get(id=game_id)
+        self.game = Game.objects.select_related('player1_device', 'player2_device').get(id=game_id)
         self.player_states = self._load_player_states()
-        self.fences = list(Fence.objects.filter(game=self.game))
-        self._fence_cache = None
+        snapshot = GameSnapshot.objects.filter(game=self.game).order_by('-seq').first()
+        self.fences = [] if snapshot else list(Fence.objects.filter(game=self.game))
+        moves = list(Move.objects.filter(game=self.game, seq__gt=snapshot.seq if snapshot else 0))
+        self._setup(snapshot, moves)
+
+    @classmethod
+    async def aload(cls, game_id: int) -> 'QuoridorEngine':
+        """Async counterpart of QuoridorEngine(game_id), for ASGI views."""
+        engine = cls.__new__(cls)
+        engine.game = await Game.objects.select_related(
+            'player1_device', 'player2_device'
+        ).aget(id=game_id)
+        engine.player_states = {
+            player_id: await PlayerState.objects.aget(**lookup)
+            for player_id, lookup in engine._player_state_lookups()
+        }
+        snapshot = await GameSnapshot.objects.filter(game=engine.game).order_by('-seq').afirst()
+        engine.fences = [] if snapshot else [
+            fence async for fence in Fence.objects.filter(game=engine.game)
+        ]
+        moves = [
+            move async for move in
+            Move.objects.filter(game=engine.game, seq__gt=snapshot.seq if snapshot else 0)
+        ]
+        engine._setup(snapshot, moves)
+        return engine
+
+    def _setup(self, snapshot: Optional[GameSnapshot], moves: List[Move]) -> None:
+        """Build the in-memory state from the loaded ORM rows."""
+        self.position = self._load_position(snapshot, moves)
+        # Moves since the snapshot (or game start), for change queries.
+        self.moves = list(moves)
+        self._history_start = snapshot.seq if snapshot else 0
+        self._bot = None
+        self._bot_future = None
+        self._notifications_due = 0.0
+        self._pending_writes = []
         self._lock = threading.RLock()
 
     def _load_player_states(self) -> Dict[str, PlayerState]:
         """Load and return player states as a dictionary."""
         return {
-            str(self.game.player1_id): PlayerState.objects.get(
-                game=self.game, 
-                player_id=self.game.player1_id
-            ),
-            str(self.game.player2_id): PlayerState.objects.get(
-                game=self.game,
-                player_id=self.game.player2_id
-            )
+            player_id: PlayerState.objects.get(**lookup)
+            for player_id, lookup in self._player_state_lookups()
         }
+
+    def _player_state_lookups(self) -> List[Tuple[str, dict]]:
+        """(player ID, PlayerState lookup) for both players, shared by the sync and async loaders."""
+        return [
+            (str(player_id), {'game': self.game, 'player_id': player_id})
+            for player_id in (self.game.player1_id, self.game.player2_id)
+        ]
     
-    def _get_fence_cache(self):
-        """Thread-safe fence cache access"""
-        with self._lock:
-            if self._fence_cache is None:
-                self._fence_cache = {
-                    'H': {(f.x, f.y) for f in self.fences if f.orientation == 'H'},
-                    'V': {(f.x, f.y) for f in self.fences if f.orientation == 'V'}
-                }
-            return self._fence_cache
+    def _load_position(self, snapshot: Optional[GameSnapshot], moves: List[Move]) -> Position:
+        """
+        Rebuild the position from the latest snapshot, or from the player and
+        fence rows when there is none, then replay the move log after it.
+        """
+        states = [
+            self.player_states[str(self.game.player1_id)],
+            self.player_states[str(self.game.player2_id)]
+        ]
+        if snapshot is not None:
+            pawns = [square(x, y) for x, y in snapshot.state['pawns']]
+            fences_left = snapshot.state['fences_left']
+            self.fences = [
+                Fence(game=self.game, player_id=player_id, x=x, y=y, orientation=orientation)
+                for x, y, orientation, player_id in snapshot.state['fences']
+            ]
+        else:
+            pawns = [square(s.pawn_position_x, s.pawn_position_y) for s in states]
+            fences_left = [s.remaining_fences for s in states]
+
+        position = Position(
+            pawns=pawns,
+            goal_rows=[GOAL_ROWS[s.goal_side] for s in states],
+            fences_left=list(fences_left),
+            to_move=self._player_index(self.game.current_player_id)
+        )
+        for fence in self.fences:
+            position.add_fence(fence.orientation, fence.x, fence.y)
+        for move in moves:
+            self._replay_move(position, move)
+        return position
+
+    def _replay_move(self, position: Position, move: Move) -> None:
+        """Apply a logged move to a position being rebuilt."""
+        player = self._player_index(move.player_id)
+        if move.kind == 'FENCE':
+            position.add_fence(move.orientation, move.x, move.y)
+            position.use_fence(player)
+            self.fences.append(Fence(
+                game=self.game,
+                player_id=move.player_id,
+                x=move.x,
+                y=move.y,
+                orientation=move.orientation
+            ))
+        else:
+            position.move_pawn(player, square(move.x, move.y))
+
+    def _snapshot_state(self) -> dict:
+        """Serialize the board for a GameSnapshot row."""
+        return {
+            'pawns': [list(coords(pawn)) for pawn in self.position.pawns],
+            'fences_left': list(self.position.fences_left),
+            'fences': [[f.x, f.y, f.orientation, str(f.player_id)] for f in self.fences]
+        }
+
+    def _player_index(self, player_id: str) -> int:
+        """Map a player ID onto its index in the position."""
+        return PLAYER_ONE if str(player_id) == str(self.game.player1_id) else PLAYER_TWO
 
     def get_state(self) -> dict:
         """Return complete game state as a dictionary."""
@@ -59,11 +208,59 @@ class QuoridorEngine:
                 'fences': [self._serialize_fence(f) for f in self.fences],
                 'current_player': str(self.game.current_player_id),
                 'status': self.game.status,
-                'winner': self.game.winner_id
+                'winner': self.game.winner_id,
+                'version': self.game.state_version
             }
 
-    def _serialize_fence(self, fence: Fence) -> dict:
-        """Serialize fence object to dictionary."""
+    def get_state_bytes(self) -> bytes:
+        """Return the board as Position.to_bytes(), the compact form of get_state."""
+        with self._lock:
+            return self.position.to_bytes()
+
+    def copy_position(self) -> Position:
+        """Return a copy of the board that later moves will not change."""
+        with self._lock:
+            return self.position.copy()
+
+    def get_changes(self, since: int) -> Optional[dict]:
+        """
+        Return what changed after version since: players whose pawn or fence
+        count changed, new fences, and the turn and status when they moved.
+        None when the engine's move history does not reach back that far.
+        """
+        with self._lock:
+            version = self.game.state_version
+            if not self._history_start <= since <= version:
+                return None
+
+            changes = {'since': since, 'version': version}
+            moves = self.moves[since - self._history_start:]
+            if not moves:
+                return changes
+
+            players = {}
+            fences = []
+            for move in moves:
+                player = self._player_index(move.player_id)
+                changed = players.setdefault(str(move.player_id), {})
+                if move.kind == 'FENCE':
+                    fences.append(self._serialize_fence(move))
+                    changed['fences_remaining'] = self.position.fences_left[player]
+                else:
+                    changed['position'] = list(coords(self.position.pawns[player]))
+
+            changes.update({
+                'players': players,
+                'fences': fences,
+                'current_player': str(self.game.current_player_id)
+            })
+            if self.game.status == 'FINISHED':
+                changes['status'] = self.game.status
+                changes['winner'] = self.game.winner_id
+            return changes
+
+    def _serialize_fence(self, fence) -> dict:
+        """Serialize a fence (or a logged fence move) to a dictionary."""
         return {
             'x': fence.x,
             'y': fence.y,
@@ -73,92 +270,67 @@ class QuoridorEngine:
 
     def _player_state(self, player_id: str) -> dict:
         """Return serialized player state."""
-        state = self.player_states[str(player_id)]
+        player = self._player_index(player_id)
         return {
-            'position': [state.pawn_position_x, state.pawn_position_y],
-            'fences_remaining': state.remaining_fences,
-            'goal': state.goal_side
+            'position': list(coords(self.position.pawns[player])),
+            'fences_remaining': self.position.fences_left[player],
+            'goal': self.player_states[str(player_id)].goal_side
         }
 
     def is_valid_move(self, player_id: str, new_x: int, new_y: int) -> bool:
         """Check if a pawn move is valid."""
-        current = self.player_states[str(player_id)]
-        opponent = self._get_opponent_state(player_id)
+        player = self._player_index(player_id)
 
         if not self._is_within_bounds(new_x, new_y):
             return False
 
-        if (new_x, new_y) == (opponent.pawn_position_x, opponent.pawn_position_y):
+        if square(new_x, new_y) == self.position.pawns[1 - player]:
             return self._is_valid_jump(player_id, new_x, new_y)
 
-        return self._is_valid_orthogonal_move(current, new_x, new_y)
+        return square(new_x, new_y) in self.position.pawn_moves(player)
 
     def _is_within_bounds(self, x: int, y: int) -> bool:
         """Check if coordinates are within game board bounds."""
         return 0 <= x < self.BOARD_SIZE and 0 <= y < self.BOARD_SIZE
 
-    def _is_valid_orthogonal_move(self, current: PlayerState, new_x: int, new_y: int) -> bool:
-        """Check validity of standard orthogonal moves."""
-        dx = abs(new_x - current.pawn_position_x)
-        dy = abs(new_y - current.pawn_position_y)
-        
-        if (dx == 1 and dy == 0) or (dx == 0 and dy == 1):
-            return not self._is_blocked(
-                current.pawn_position_x,
-                current.pawn_position_y,
-                new_x,
-                new_y
-            )
-        return False
-
     def _is_valid_jump(self, player_id: str, jump_x: int, jump_y: int) -> bool:
-        """Check if jumping over opponent is valid."""
-        current = self.player_states[str(player_id)]
-        
-        if not self._is_adjacent(current.pawn_position_x, current.pawn_position_y, jump_x, jump_y):
-            return False
-            
-        landing_x, landing_y = self._calculate_jump_landing(current, jump_x, jump_y)
+        """Check if jumping straight over the opponent at (jump_x, jump_y) is valid."""
+        player = self._player_index(player_id)
+        landing_x, landing_y = self._calculate_jump_landing(player, jump_x, jump_y)
         
         return (self._is_within_bounds(landing_x, landing_y) and
-                not self._is_blocked(jump_x, jump_y, landing_x, landing_y))
+                square(landing_x, landing_y) in self.position.pawn_moves(player))
 
-    def _is_adjacent(self, x1: int, y1: int, x2: int, y2: int) -> bool:
-        """Check if two positions are adjacent."""
-        return abs(x1 - x2) <= 1 and abs(y1 - y2) <= 1
-
-    def _calculate_jump_landing(self, current: PlayerState, jump_x: int, jump_y: int) -> Tuple[int, int]:
+    def _calculate_jump_landing(self, player: int, jump_x: int, jump_y: int) -> Tuple[int, int]:
         """Calculate landing position after a jump."""
+        current_x, current_y = coords(self.position.pawns[player])
         return (
-            jump_x + (jump_x - current.pawn_position_x),
-            jump_y + (jump_y - current.pawn_position_y)
+            jump_x + (jump_x - current_x),
+            jump_y + (jump_y - current_y)
         )
 
-    def _is_blocked(self, from_x: int, from_y: int, to_x: int, to_y: int) -> bool:
-        """Check if movement between positions is blocked by a fence."""
-        fence_cache = self._get_fence_cache()
-        
-        if from_y == to_y:  # Horizontal move
-            min_x = min(from_x, to_x)
-            return (
-                (min_x, from_y) in fence_cache['V'] or
-                (min_x, from_y-1) in fence_cache['V']
-            )
-        else:  # Vertical move
-            min_y = min(from_y, to_y)
-            return (
-                (from_x, min_y) in fence_cache['H'] or
-                (from_x-1, min_y) in fence_cache['H']
-            )
+    def legal_pawn_moves(self, player_id: str) -> Iterator[Tuple[int, int]]:
+        """Yield every (x, y) the player's pawn can move to, jumps included."""
+        with self._lock:
+            squares = self.position.pawn_moves(self._player_index(player_id))
+        for sq in squares:
+            yield coords(sq)
+
+    def legal_fences(self, player_id: str) -> Iterator[Tuple[int, int, str]]:
+        """Yield every (x, y, orientation) fence the player can legally place."""
+        with self._lock:
+            moves = self.position.fence_moves(self._player_index(player_id))
+        for move in moves:
+            orientation, x, y = decode_fence(move)
+            yield x, y, orientation
+
+    def legal_moves(self, player_id: str) -> Iterator[tuple]:
+        """Yield ('move', x, y) and ('fence', x, y, orientation) actions for the player."""
+        for x, y in self.legal_pawn_moves(player_id):
+            yield 'move', x, y
+        for x, y, orientation in self.legal_fences(player_id):
+            yield 'fence', x, y, orientation
 
-    def _get_opponent_state(self, player_id: str) -> PlayerState:
-        """Get the opponent's PlayerState."""
-        opponent_id = (
-            self.game.player2_id if str(player_id) == str(self.game.player1_id)
-            else self.game.player1_id
-        )
-        return self.player_states[str(opponent_id)]
-    
     def _get_player_device(self, player_id: str) -> Optional[Device]:
         """Get the device associated with a player."""
         return (
@@ -168,122 +340,276 @@ class QuoridorEngine:
     
     def move_pawn(self, player_id: str, new_x: int, new_y: int) -> bool:
         with self._lock:
-            if not self._is_players_turn(player_id):
-                self._notify_invalid_move(player_id)
-                return False
+            savepoint = self._savepoint()
+            applied = self._apply_pawn_move(player_id, new_x, new_y)
+            writes = self._take_writes()
+        if not applied:
+            self._notify_invalid_move(player_id)
+            return False
+        self._commit_or_rollback(writes, savepoint)
+        self._after_move(player_id)
+        return True
 
-            current = self.player_states[str(player_id)]
-            if self._is_same_position(current, new_x, new_y):
-                self._notify_invalid_move(player_id)
-                return False
+    async def amove_pawn(self, player_id: str, new_x: int, new_y: int) -> bool:
+        """Async counterpart of move_pawn; the database writes are awaited."""
+        with self._lock:
+            savepoint = self._savepoint()
+            applied = self._apply_pawn_move(player_id, new_x, new_y)
+            writes = self._take_writes()
+        if not applied:
+            self._notify_invalid_move(player_id)
+            return False
+        await self._acommit_or_rollback(writes, savepoint)
+        self._after_move(player_id)
+        return True
 
-            if self._attempt_jump_move(player_id, current, new_x, new_y):
-                self._handle_successful_move(player_id)
-                return True
+    def _apply_pawn_move(self, player_id: str, new_x: int, new_y: int) -> bool:
+        """Play a pawn move in memory and queue its writes; False if it is illegal."""
+        if not self._may_move(player_id):
+            return False
 
-            if self._attempt_normal_move(player_id, current, new_x, new_y):
-                self._handle_successful_move(player_id)
-                return True
+        player = self._player_index(player_id)
+        if self._is_same_position(player, new_x, new_y):
+            return False
 
-            self._notify_invalid_move(player_id)
+        if not (self._attempt_jump_move(player_id, player, new_x, new_y) or
+                self._attempt_normal_move(player_id, player, new_x, new_y)):
             return False
 
+        landing_x, landing_y = coords(self.position.pawns[player])
+        self._record_move(player_id, 'PAWN', landing_x, landing_y)
+        return True
+
+    def _may_move(self, player_id: str) -> bool:
+        """Check that the game is still on and it is the player's turn."""
+        return self.game.status != 'FINISHED' and self._is_players_turn(player_id)
+
     def _is_players_turn(self, player_id: str) -> bool:
         """Check if it's the player's turn."""
         return str(self.game.current_player_id) == str(player_id)
 
-    def _is_same_position(self, current: PlayerState, x: int, y: int) -> bool:
+    def _is_same_position(self, player: int, x: int, y: int) -> bool:
         """Check if position matches current position."""
-        return (x, y) == (current.pawn_position_x, current.pawn_position_y)
+        return square(x, y) == self.position.pawns[player]
 
-    def _attempt_jump_move(self, player_id: str, current: PlayerState, x: int, y: int) -> bool:
+    def _attempt_jump_move(self, player_id: str, player: int, x: int, y: int) -> bool:
         """Attempt to execute a jump move if valid."""
-        opponent = self._get_opponent_state(player_id)
-        
-        if (x, y) != (opponent.pawn_position_x, opponent.pawn_position_y):
+        if square(x, y) != self.position.pawns[1 - player]:
             return False
 
         if not self._is_valid_jump(player_id, x, y):
             return False
 
-        landing_x, landing_y = self._calculate_jump_landing(current, x, y)
-        current.pawn_position_x = landing_x
-        current.pawn_position_y = landing_y
+        landing_x, landing_y = self._calculate_jump_landing(player, x, y)
+        self.position.move_pawn(player, square(landing_x, landing_y))
         return True
 
-    def _attempt_normal_move(self, player_id: str, current: PlayerState, x: int, y: int) -> bool:
+    def _attempt_normal_move(self, player_id: str, player: int, x: int, y: int) -> bool:
         """Attempt to execute a normal move if valid."""
         if not self.is_valid_move(player_id, x, y):
             return False
-        current.pawn_position_x = x
-        current.pawn_position_y = y
+        self.position.move_pawn(player, square(x, y))
         return True
 
     def _notify_invalid_move(self, player_id: str) -> None:
         """Notify player of invalid move."""
         if device := self._get_player_device(player_id):
-            QuoridorMQTTPublisher.publish_move_validity(device, False)
+            turn_scheduler.call_later(0, QuoridorMQTTPublisher.publish_move_validity, device, False)
 
-    def _handle_successful_move(self, player_id: str) -> None:
-        """Handle successful move operations."""
-        current = self.player_states[str(player_id)]
-        current.save()
+    def _record_move(self, player_id: str, kind: str, x: int, y: int, orientation: str = '') -> None:
+        """Log the move just played, settle the win and turn, and snapshot when due."""
         self._check_win_condition(player_id)
-        
-        if device := self._get_player_device(player_id):
-            QuoridorMQTTPublisher.publish_move_validity(device, True)
-
-        time.sleep(0.7)
         self._switch_turns()
+        self.game.state_version += 1
+        self.game.position = self.position.to_bytes()
+        move = Move(
+            game=self.game,
+            seq=self.game.state_version,
+            player_id=player_id,
+            kind=kind,
+            x=x,
+            y=y,
+            orientation=orientation
+        )
+        self.moves.append(move)
+        self._queue_insert(move)
+        if self.game.state_version % self.SNAPSHOT_INTERVAL == 0:
+            self._queue_insert(GameSnapshot(
+                game=self.game,
+                seq=self.game.state_version,
+                state=self._snapshot_state()
+            ))
+
+    def _after_move(self, player_id: str) -> None:
+        """Notify devices and hand over to the bot once a move has been saved."""
+        self.publish_state()
+        if self.position.is_goal(self._player_index(player_id)):
+            self._notify_game_result()
+        self._queue_move_notifications(player_id)
+
+        self.resume_bot_turn()
+
+    def resume_bot_turn(self) -> None:
+        """Start the bot's move if it is the bot's turn, e.g. after loading the game."""
+        if self._is_bot_turn():
+            self._bot_future = schedule_bot_turn(self.game.id)
+
+    def publish_state(self) -> None:
+        """Offer the current state to the game's event streams."""
+        with self._lock:
+            version, state = self.game.state_version, self.get_state()
+        game_events.publish(self.game.id, version, state)
+
+    def _queue_insert(self, row) -> None:
+        """Queue a new Move or GameSnapshot row for the next commit."""
+        self._pending_writes.append(row)
+
+    def _take_writes(self) -> Tuple[dict, list]:
+        """Hand over the queued rows along with the game fields they leave behind."""
+        rows, self._pending_writes = self._pending_writes, []
+        return {field: getattr(self.game, field) for field in self.GAME_STATE_FIELDS}, rows
+
+    async def _acommit_writes(self, writes: Tuple[dict, list]) -> None:
+        """Commit writes taken with _take_writes from async code."""
+        # Django has no async transactions, so the commit runs on the ORM's sync thread.
+        await sync_to_async(self._save_writes)(writes)
+
+    def _commit_or_rollback(self, writes: Tuple[dict, list], savepoint: tuple) -> None:
+        """
+        Commit writes taken with _take_writes, or undo their moves in memory if
+        the commit fails. Called without the engine lock, so readers (and the
+        event loop, for async views) never wait on the database.
+        """
+        try:
+            self._save_writes(writes)
+        except Exception:
+            with self._lock:
+                self._rollback_to(savepoint)
+            raise
+
+    async def _acommit_or_rollback(self, writes: Tuple[dict, list], savepoint: tuple) -> None:
+        """Async counterpart of _commit_or_rollback."""
+        try:
+            await self._acommit_writes(writes)
+        except Exception:
+            with self._lock:
+                self._rollback_to(savepoint)
+            raise
+
+    def _save_writes(self, writes: Tuple[dict, list]) -> None:
+        """
+        Write the game row and its new log rows in one transaction.
+
+        The game row is locked first and must still be at the version these
+        moves were played from; otherwise another worker has committed a move
+        this engine has not seen, and StaleGameError is raised instead.
+        """
+        game_fields, rows = writes
+        moves = [row for row in rows if isinstance(row, Move)]
+        snapshots = [row for row in rows if isinstance(row, GameSnapshot)]
+        expected = moves[0].seq - 1
+        try:
+            with transaction.atomic():
+                stored = Game.objects.select_for_update().values_list(
+                    'state_version', flat=True
+                ).get(id=self.game.id)
+                if stored != expected:
+                    raise StaleGameError(
+                        f"Game {self.game.id} is at version {stored}, expected {expected}"
+                    )
+                Game.objects.filter(id=self.game.id).update(**game_fields)
+                Move.objects.bulk_create(moves)
+                if snapshots:
+                    GameSnapshot.objects.bulk_create(snapshots)
+        except IntegrityError as e:
+            # SQLite ignores select_for_update; the unique (game, seq) index catches the race.
+            raise StaleGameError(f"Game {self.game.id} was changed concurrently") from e
+
+    def _queue_move_notifications(self, player_id: str) -> None:
+        """
+        Schedule the mover's valid-move flash and, after the transition
+        delay, the turn change. The move is already committed, so the request
+        returns at once; notifications for moves made during an earlier
+        transition queue up behind it instead of overtaking it.
+        """
+        with self._lock:
+            start = max(time.monotonic(), self._notifications_due)
+            self._notifications_due = start + self.TURN_TRANSITION_DELAY
+            current_id = str(self.game.current_player_id)
+            position = self.position.to_bytes()
+
+        if device := self._get_player_device(player_id):
+            turn_scheduler.call_at(start, QuoridorMQTTPublisher.publish_move_validity, device, True)
+        for device in (self.game.player1_device, self.game.player2_device):
+            if device:
+                turn_scheduler.call_at(start, QuoridorMQTTPublisher.publish_position, device, position)
+        turn_scheduler.call_at(self._notifications_due, self._notify_turn_change, current_id)
     
     def _check_win_condition(self, player_id: str) -> None:
         """Check if player has won the game."""
-        state = self.player_states[str(player_id)]
-        
-        if (state.goal_side == 'TOP' and state.pawn_position_y == self.BOARD_SIZE-1) or \
-           (state.goal_side == 'BOTTOM' and state.pawn_position_y == 0):
+        if self.position.is_goal(self._player_index(player_id)):
             self._declare_winner(player_id)
 
     def _declare_winner(self, player_id: str) -> None:
         """Handle game win conditions."""
         self.game.winner_id = player_id
         self.game.status = 'FINISHED'
-        self.game.save()
-        self._notify_game_result()
 
     def _notify_game_result(self) -> None:
         """Notify both players of game result."""
         winner_str = str(self.game.winner_id)
         
         if self.game.player1_device:
-            QuoridorMQTTPublisher.publish_game_result(
+            turn_scheduler.call_later(
+                0, QuoridorMQTTPublisher.publish_game_result,
                 self.game.player1_device,
                 winner_str == str(self.game.player1_id)
             )
             
         if self.game.player2_device:
-            QuoridorMQTTPublisher.publish_game_result(
+            turn_scheduler.call_later(
+                0, QuoridorMQTTPublisher.publish_game_result,
                 self.game.player2_device,
                 winner_str == str(self.game.player2_id)
             )
 
     def _switch_turns(self) -> None:
-        """Switch turns between players and notify devices."""
+        """Switch turns between players."""
         with self._lock:
             self.game.current_player_id = (
                 self.game.player2_id if str(self.game.current_player_id) == str(self.game.player1_id)
                 else self.game.player1_id
             )
-            self.game.save()
+            self.position.set_to_move(self._player_index(self.game.current_player_id))
 
-        threading.Thread(
-            target=self._notify_turn_change,
-            daemon=True
-        ).start()
+    def _is_bot_turn(self) -> bool:
+        """Check if player 2 is a built-in bot and it is its move."""
+        return (
+            bool(self.game.player2_bot) and
+            self.game.status != 'FINISHED' and
+            str(self.game.current_player_id) == str(self.game.player2_id)
+        )
+
+    def _play_bot_move(self) -> bool:
+        """Let the configured bot choose and play player 2's move, if it is still its turn."""
+        if not self._is_bot_turn():
+            return True
+        if self._bot is None:
+            self._bot = BOTS[self.game.player2_bot](
+                time_budget_ms=settings.AI_CONFIG['TIME_BUDGET_MS']
+            )
 
-    def _notify_turn_change(self) -> None:
-        """Notify players about turn changes."""
-        current_id = str(self.game.current_player_id)
+        move = self._bot.choose_move(self.copy_position())
+
+        player_id = str(self.game.player2_id)
+        if is_fence_move(move):
+            orientation, x, y = decode_fence(move)
+            return self.place_fence(player_id, x, y, orientation)
+        x, y = coords(move)
+        return self.move_pawn(player_id, x, y)
+
+    def _notify_turn_change(self, current_id: str) -> None:
+        """Notify players that it is now current_id's turn."""
         
         if self.game.player1_device:
             QuoridorMQTTPublisher.publish_turn(
@@ -299,43 +625,111 @@ class QuoridorEngine:
 
     def place_fence(self, player_id: str, x: int, y: int, orientation: str) -> bool:
         """Place a fence if valid."""
-        if not self._validate_fence_placement(player_id, x, y, orientation):
+        with self._lock:
+            savepoint = self._savepoint()
+            applied = self._apply_fence(player_id, x, y, orientation)
+            writes = self._take_writes()
+        if not applied:
+            self._notify_invalid_move(player_id)
+            return False
+        self._commit_or_rollback(writes, savepoint)
+        self._after_move(player_id)
+        return True
+
+    async def aplace_fence(self, player_id: str, x: int, y: int, orientation: str) -> bool:
+        """Async counterpart of place_fence; the database writes are awaited."""
+        with self._lock:
+            savepoint = self._savepoint()
+            applied = self._apply_fence(player_id, x, y, orientation)
+            writes = self._take_writes()
+        if not applied:
             self._notify_invalid_move(player_id)
             return False
+        await self._acommit_or_rollback(writes, savepoint)
+        self._after_move(player_id)
+        return True
 
-        new_fence = Fence(
+    def _apply_fence(self, player_id: str, x: int, y: int, orientation: str) -> bool:
+        """Place a fence in memory and queue its writes; False if it is illegal."""
+        if not self._may_move(player_id):
+            return False
+
+        if not self._validate_fence_placement(player_id, x, y, orientation):
+            return False
+
+        may_disconnect = self.position.fence_may_disconnect(orientation, x, y)
+        self.position.add_fence(orientation, x, y)
+
+        if may_disconnect and not self._validate_paths_after_fence():
+            self.position.remove_fence(orientation, x, y)
+            return False
+
+        self.fences.append(Fence(
             game=self.game,
             player_id=player_id,
             x=x,
             y=y,
             orientation=orientation
-        )
-        
+        ))
+        self.position.use_fence(self._player_index(player_id))
+        self._record_move(player_id, 'FENCE', x, y, orientation)
+        return True
+
+    def play_actions(self, actions: List[tuple]) -> Optional[int]:
+        """
+        Play ('move', player_id, x, y) and ('fence', player_id, x, y, orientation)
+        actions in order and commit them together.
+
+        Every action must be legal and made in turn. Returns None once all are
+        committed, or the index of the first one that is not, in which case
+        none of them are applied.
+        """
+        if not actions:
+            return None
         with self._lock:
-            self.fences.append(new_fence)
-            self._fence_cache = None
-                
-            if not self._validate_paths_after_fence():
-                self.fences.remove(new_fence)
-                self._fence_cache = None
-                self._notify_invalid_move(player_id)
-                return False
-                    
-            new_fence.save()
-            self._update_player_fences(player_id)
-            self._handle_successful_move(player_id)
-            return True
-            
+            savepoint = self._savepoint()
+            for index, (kind, player_id, *args) in enumerate(actions):
+                applied = (self._apply_pawn_move(player_id, *args) if kind == 'move'
+                           else self._apply_fence(player_id, *args))
+                if not applied:
+                    self._rollback_to(savepoint)
+                    return index
+            writes = self._take_writes()
+        self._commit_or_rollback(writes, savepoint)
+        self._after_move(player_id)
+        return None
+
+    def _savepoint(self) -> tuple:
+        """Capture what applying moves changes, for _rollback_to."""
+        return (
+            self.position.copy(),
+            len(self.fences),
+            len(self.moves),
+            len(self._pending_writes),
+            {field: getattr(self.game, field) for field in self.GAME_STATE_FIELDS}
+        )
+
+    def _rollback_to(self, savepoint: tuple) -> None:
+        """Undo in-memory moves applied since the savepoint was taken."""
+        self.position, fences, moves, writes, game_fields = savepoint
+        del self.fences[fences:]
+        del self.moves[moves:]
+        del self._pending_writes[writes:]
+        for field, value in game_fields.items():
+            setattr(self.game, field, value)
+
     def _validate_fence_placement(self, player_id: str, x: int, y: int, orientation: str) -> bool:
         """Check fence placement validity."""
+        if orientation not in ORIENTATIONS:
+            return False
+
         if not self._is_within_fence_bounds(x, y):
             return False
             
         if self._is_fence_overlapping(x, y, orientation):
             return False
             
-        player_state = self.player_states[str(player_id)]
-        if player_state.remaining_fences <= 0:
+        if self.position.fences_left[self._player_index(player_id)] <= 0:
             return False
             
         return True
@@ -345,81 +739,11 @@ class QuoridorEngine:
         return 0 <= x < self.BOARD_SIZE-1 and 0 <= y < self.BOARD_SIZE-1
 
     def _is_fence_overlapping(self, x: int, y: int, orientation: str) -> bool:
-        """Check for overlapping or invalid fence placements."""
-        fence_cache = self._get_fence_cache()
-        if orientation == 'H':
-            return (x, y) in fence_cache['H'] or (x+1, y) in fence_cache['H']
-        else:
-            return (x, y) in fence_cache['V'] or (x, y+1) in fence_cache['V']
-
-    def _update_player_fences(self, player_id: str) -> None:
-        """Update player's remaining fence count."""
-        player_state = self.player_states[str(player_id)]
-        player_state.remaining_fences -= 1
-        player_state.save()
+        """Check for overlapping or crossing fence placements."""
+        free_h, free_v = self.position.free_fence_slots()
+        return not (free_h if orientation == 'H' else free_v) & fence_bit(x, y)
 
     def _validate_paths_after_fence(self) -> bool:
-        """Thread-safe path validation using state snapshots."""
+        """Check that both players can still reach their goal rows."""
         with self._lock:
-            fence_snapshot = list(self.fences)
-            player_states = {k: v for k, v in self.player_states.items()}
-        
-        try:
-            with ThreadPoolExecutor(max_workers=2) as executor:
-                futures = {
-                    executor.submit(self._check_path_with_snapshot, pid, state, fence_snapshot)
-                    for pid, state in player_states.items()
-                }
-                
-                for future in as_completed(futures, timeout=2.0):
-                    if not future.result():
-                        return False
-                return True
-                
-        except TimeoutError:
-            return False
-
-    def _check_path_with_snapshot(self, pid, state, fence_snapshot):
-        """Thread-safe path checking using snapshot"""
-        temp_cache = {
-            'H': {(f.x, f.y) for f in fence_snapshot if f.orientation == 'H'},
-            'V': {(f.x, f.y) for f in fence_snapshot if f.orientation == 'V'}
-        }
-        return self._path_exists_with_cache(state, temp_cache)
-
-    def _path_exists_with_cache(self, state, cache):
-        """BFS using provided cache"""
-        start = (state.pawn_position_x, state.pawn_position_y)
-        goal_y = self.BOARD_SIZE - 1 if state.goal_side == 'TOP' else 0
-        
-        visited = set([start])
-        queue = deque([start])
-        
-        while queue:
-            x, y = queue.popleft()
-            
-            for dx, dy in self.DIRECTIONS:
-                nx, ny = x + dx, y + dy
-                
-                if (0 <= nx < self.BOARD_SIZE and 0 <= ny < self.BOARD_SIZE and
-                    not self._is_blocked_with_cache(x, y, nx, ny, cache) and
-                    (nx, ny) not in visited):
-                    
-                    if ny == goal_y:
-                        return True
-                        
-                    visited.add((nx, ny))
-                    queue.append((nx, ny))
-        
-        return False
-
-    def _is_blocked_with_cache(self, from_x, from_y, to_x, to_y, cache):
-        """Check blockage using provided cache"""
-        if from_y == to_y:  # Horizontal
-            min_x = min(from_x, to_x)
-            return ((min_x, from_y) in cache['V'] or 
-                    (min_x, from_y-1) in cache['V'])
-        else:  # Vertical
-            min_y = min(from_y, to_y)
-            return ((from_x, min_y) in cache['H'] or 
-                    (from_x-1, min_y) in cache['H'])
\ No newline at end of file
+            return self.position.paths_exist()
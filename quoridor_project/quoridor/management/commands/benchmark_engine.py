@@ -0,0 +1,43 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from ...benchmarks import run_benchmarks, compare
+
+
+class Command(BaseCommand):
+    help = 'Runs the engine microbenchmarks, saves the results as JSON and optionally compares them to an earlier run'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--iterations', type=int, default=1000, help='Operations timed per benchmark')
+        parser.add_argument('--seed', type=int, default=0, help='Seed for the benchmark game')
+        parser.add_argument('--output', type=str, default='bench_results.json', help='File the results are written to')
+        parser.add_argument('--compare', type=str, default=None, help='Earlier results file to compare against')
+        parser.add_argument('--threshold', type=float, default=0.1, help='Fractional ops/sec drop that counts as a regression')
+
+    def handle(self, *args, **options):
+        results = run_benchmarks(iterations=options['iterations'], seed=options['seed'])
+        with open(options['output'], 'w') as output:
+            json.dump(results, output, indent=2)
+
+        comparison = {}
+        if options['compare']:
+            with open(options['compare']) as baseline_file:
+                comparison = compare(json.load(baseline_file), results, options['threshold'])
+
+        lines = [f"{'benchmark':<14}{'ops/sec':>12}{'p50 us':>10}{'p99 us':>10}{'change':>9}"]
+        for name, result in results['results'].items():
+            delta = comparison.get(name)
+            change = f"{delta['change']:+.1%}" if delta else ''
+            if delta and delta['regression']:
+                change += ' !'
+            lines.append(
+                f"{name:<14}{result['ops_per_sec']:>12.1f}{result['p50_us']:>10.1f}"
+                f"{result['p99_us']:>10.1f}{change:>9}"
+            )
+        lines.append(f"Results written to {options['output']}")
+        self.stdout.write("\n".join(lines))
+
+        regressions = [name for name, delta in comparison.items() if delta and delta['regression']]
+        if regressions:
+            raise CommandError(f"Regressions against {options['compare']}: {', '.join(regressions)}")
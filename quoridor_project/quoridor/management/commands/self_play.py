@@ -0,0 +1,70 @@
+import json
+import os
+import random
+import time
+from collections import Counter
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+from django.core.management.base import BaseCommand
+
+from ...ai import BOTS
+from ...selfplay import play_game
+
+
+class Command(BaseCommand):
+    help = 'Plays bot-vs-bot games headlessly (no DB, MQTT or delays) and streams them to a JSON lines file'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--games', type=int, default=100, help='Number of games to play')
+        parser.add_argument('--player1', type=str, default='alphabeta', choices=sorted(BOTS), help='Bot playing as player 1')
+        parser.add_argument('--player2', type=str, default='alphabeta', choices=sorted(BOTS), help='Bot playing as player 2')
+        parser.add_argument('--time-budget-ms', type=int, default=50, help='Per-move thinking time for each bot')
+        parser.add_argument('--workers', type=int, default=os.cpu_count() or 1, help='Worker processes')
+        parser.add_argument('--opening-plies', type=int, default=2, help='Random pawn moves played before the bots take over')
+        parser.add_argument('--max-plies', type=int, default=200, help='Plies after which a game is recorded as a draw')
+        parser.add_argument('--seed', type=int, default=None, help='Seed for reproducible runs')
+        parser.add_argument('--output', type=str, default='selfplay.jsonl', help='File the game records are appended to')
+
+    def handle(self, *args, **options):
+        rng = random.Random(options['seed'])
+        jobs = (
+            (index, options['player1'], options['player2'], options['time_budget_ms'],
+             rng.getrandbits(32), options['opening_plies'], options['max_plies'])
+            for index in range(options['games'])
+        )
+
+        winners = Counter()
+        total_plies = 0
+        started = time.monotonic()
+
+        with open(options['output'], 'a') as output, \
+                ProcessPoolExecutor(max_workers=options['workers']) as executor:
+            # Keep a bounded window of games in flight so huge runs stay flat in memory.
+            pending = set()
+            for job in jobs:
+                pending.add(executor.submit(play_game, *job))
+                if len(pending) >= options['workers'] * 4:
+                    done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                    total_plies += self._write_results(done, output, winners)
+            total_plies += self._write_results(wait(pending).done, output, winners)
+
+        elapsed = time.monotonic() - started
+        played = sum(winners.values())
+        self.stdout.write("\n".join([
+            f"Played {played} games in {elapsed:.1f}s ({played / elapsed if elapsed else 0:.1f} games/s)",
+            f"Player 1 ({options['player1']}) wins: {winners[0]}",
+            f"Player 2 ({options['player2']}) wins: {winners[1]}",
+            f"Draws: {winners[None]}",
+            f"Average length: {total_plies / played if played else 0:.1f} plies",
+            f"Results appended to {options['output']}",
+        ]))
+
+    def _write_results(self, futures, output, winners) -> int:
+        """Write finished game records and return the plies they contained."""
+        plies = 0
+        for future in futures:
+            record = future.result()
+            output.write(json.dumps(record, separators=(',', ':')) + "\n")
+            winners[record['winner']] += 1
+            plies += record['plies']
+        return plies
@@ -1,4 +1,5 @@
 from django.core.management.base import BaseCommand
+from ...ai import BOTS
 from ...models import Game, Device
 
 class Command(BaseCommand):
@@ -7,6 +8,7 @@ class Command(BaseCommand):
     def add_arguments(self, parser):
         parser.add_argument('--player1-device', type=str, default=None, help='Device ID for player 1 (optional)')
         parser.add_argument('--player2-device', type=str, default=None, help='Device ID for player 2 (optional)')
+        parser.add_argument('--player2-bot', type=str, default=None, choices=sorted(BOTS), help='Built-in bot to play as player 2 (optional)')
 
     def handle(self, *args, **options):
         # Handle player1 device (optional)
@@ -31,7 +33,8 @@ class Command(BaseCommand):
             player2_id='player2',
             status='IN_PROGRESS',
             player1_device=player1_device,
-            player2_device=player2_device
+            player2_device=player2_device,
+            player2_bot=options.get('player2_bot') or ''
         )
         
         output = [
@@ -40,6 +43,7 @@ class Command(BaseCommand):
             f"Player 1 Device: {player1_device.device_id if player1_device else 'None'}",
             f"Player 2 ID: {game.player2_id}",
             f"Player 2 Device: {player2_device.device_id if player2_device else 'None'}",
+            f"Player 2 Bot: {game.player2_bot or 'None'}",
             f"Current player: {game.current_player_id}"
         ]
         
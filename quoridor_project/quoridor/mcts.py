@@ -0,0 +1,190 @@
+import math
+import multiprocessing
+import os
+import random
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional, Tuple
+
+from .board import Position
+
+_executors: Dict[int, ProcessPoolExecutor] = {}
+_executors_lock = threading.Lock()
+
+
+def _get_executor(workers: int) -> ProcessPoolExecutor:
+    """
+    Process-wide pool per worker count, started on first use and then reused.
+
+    Workers come from a forkserver rather than fork: the server process runs
+    scheduler, MQTT and bot threads, and forking it could hand a child a lock
+    some other thread held at the time.
+    """
+    with _executors_lock:
+        if workers not in _executors:
+            _executors[workers] = ProcessPoolExecutor(
+                max_workers=workers, mp_context=multiprocessing.get_context('forkserver')
+            )
+        return _executors[workers]
+
+
+class _Node:
+    """Search tree node; ``player`` is the side that played ``move``."""
+
+    __slots__ = ('move', 'parent', 'player', 'children', 'untried', 'visits', 'wins')
+
+    def __init__(self, move: Optional[int], parent: Optional['_Node'], position: Position):
+        self.move = move
+        self.parent = parent
+        self.player = 1 - position.to_move
+        self.children: List['_Node'] = []
+        self.untried = [] if _winner(position) is not None else _expansion_moves(position)
+        self.visits = 0
+        self.wins = 0.0
+
+    def best_child(self, exploration: float) -> '_Node':
+        """UCB1 selection among expanded children."""
+        log_visits = math.log(self.visits)
+        return max(
+            self.children,
+            key=lambda child: (
+                child.wins / child.visits +
+                exploration * math.sqrt(log_visits / child.visits)
+            )
+        )
+
+
+def _winner(position: Position) -> Optional[int]:
+    """Player who just reached their goal row, if any."""
+    mover = 1 - position.to_move
+    return mover if position.is_goal(mover) else None
+
+
+def _expansion_moves(position: Position) -> List[int]:
+    """Moves considered in the tree: every pawn move and every path-cutting fence."""
+    player = position.to_move
+    return position.pawn_moves(player) + position.blocking_fences(player)
+
+
+def _playout(position: Position, rng: random.Random, max_plies: int,
+             guided_rate: float, fence_rate: float) -> int:
+    """
+    Play a guided random game from position and return the winner.
+
+    Pawns usually follow their shortest path and sometimes wander; fences
+    are drawn from those that cut the opponent's path. Playouts that hit
+    max_plies are scored by who is closer to goal, the side to move
+    winning ties.
+    """
+    for _ in range(max_plies):
+        winner = _winner(position)
+        if winner is not None:
+            return winner
+
+        player = position.to_move
+        if position.fences_left[player] and rng.random() < fence_rate:
+            fences = position.blocking_fences(player)
+            if fences:
+                position.play(rng.choice(fences))
+                continue
+
+        moves = position.pawn_moves(player)
+        path = position.shortest_path(player)
+        if rng.random() < guided_rate and path and path[1] in moves:
+            position.play(path[1])
+        else:
+            position.play(rng.choice(moves))
+
+    winner = _winner(position)
+    if winner is not None:
+        return winner
+    player = position.to_move
+    return player if position.distance(player) <= position.distance(1 - player) else 1 - player
+
+
+def search_tree(position: Position, time_budget_ms: int, seed: int, exploration: float = 1.4,
+                max_plies: int = 40, guided_rate: float = 0.7, fence_rate: float = 0.1,
+                max_iterations: Optional[int] = None) -> Tuple[Dict[int, Tuple[int, float]], int]:
+    """
+    Grow one UCT tree from position until the budget or iteration cap runs out.
+
+    Returns ({root move: (visits, wins)}, iterations). This is the unit of
+    work each process runs under root parallelism.
+    """
+    rng = random.Random(seed)
+    root = _Node(None, None, position)
+    deadline = time.monotonic() + time_budget_ms / 1000
+    iterations = 0
+
+    while time.monotonic() < deadline and (max_iterations is None or iterations < max_iterations):
+        node = root
+        state = position.copy()
+
+        while not node.untried and node.children:
+            node = node.best_child(exploration)
+            state.play(node.move)
+
+        if node.untried:
+            move = node.untried.pop(rng.randrange(len(node.untried)))
+            state.play(move)
+            child = _Node(move, node, state)
+            node.children.append(child)
+            node = child
+
+        winner = _playout(state, rng, max_plies, guided_rate, fence_rate)
+
+        while node is not None:
+            node.visits += 1
+            if node.player == winner:
+                node.wins += 1
+            node = node.parent
+        iterations += 1
+
+    return {child.move: (child.visits, child.wins) for child in root.children}, iterations
+
+
+class MCTSPlayer:
+    """
+    Monte Carlo tree search player using root parallelism.
+
+    Each worker process grows an independent tree from the same root with
+    its own seed for the whole time budget; root visit counts are then
+    summed and the most visited move is played. With ``workers=1`` the
+    search runs in the calling process.
+    """
+
+    def __init__(self, time_budget_ms: int = 500, workers: Optional[int] = None,
+                 seed: Optional[int] = None, max_iterations: Optional[int] = None):
+        self.time_budget_ms = time_budget_ms
+        self.workers = workers or os.cpu_count() or 1
+        self.max_iterations = max_iterations
+        self.iterations = 0
+        self._rng = random.Random(seed)
+
+    def choose_move(self, position: Position) -> int:
+        """Return the most visited root move across all workers."""
+        seeds = [self._rng.getrandbits(32) for _ in range(self.workers)]
+        if self.workers == 1:
+            results = [search_tree(position, self.time_budget_ms, seeds[0],
+                                   max_iterations=self.max_iterations)]
+        else:
+            executor = _get_executor(self.workers)
+            futures = [
+                executor.submit(search_tree, position, self.time_budget_ms, seed,
+                                max_iterations=self.max_iterations)
+                for seed in seeds
+            ]
+            results = [future.result() for future in futures]
+
+        visits = Counter()
+        self.iterations = 0
+        for stats, iterations in results:
+            self.iterations += iterations
+            for move, (move_visits, _wins) in stats.items():
+                visits[move] += move_visits
+
+        if not visits:
+            return _expansion_moves(position)[0]
+        return visits.most_common(1)[0][0]
@@ -0,0 +1,17 @@
+# Generated by Django 5.2 on 2026-10-17 15:58
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("quoridor", "0003_device_game_player1_device_game_player2_device"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="game",
+            name="player2_bot",
+            field=models.CharField(blank=True, default="", max_length=20),
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 5.2 on 2026-10-17 17:12
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("quoridor", "0004_game_player2_bot"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="game",
+            name="state_version",
+            field=models.PositiveIntegerField(default=0),
+        ),
+    ]
@@ -0,0 +1,105 @@
+# Generated by Django 5.2 on 2026-10-17 17:40
+
+import django.core.validators
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("quoridor", "0005_game_state_version"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="GameSnapshot",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("seq", models.PositiveIntegerField()),
+                ("state", models.JSONField()),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+                (
+                    "game",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="snapshots",
+                        to="quoridor.game",
+                    ),
+                ),
+            ],
+            options={
+                "unique_together": {("game", "seq")},
+            },
+        ),
+        migrations.CreateModel(
+            name="Move",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("seq", models.PositiveIntegerField()),
+                ("player_id", models.CharField(max_length=20)),
+                (
+                    "kind",
+                    models.CharField(
+                        choices=[("PAWN", "Pawn move"), ("FENCE", "Fence placement")],
+                        max_length=5,
+                    ),
+                ),
+                (
+                    "x",
+                    models.IntegerField(
+                        validators=[
+                            django.core.validators.MinValueValidator(0),
+                            django.core.validators.MaxValueValidator(8),
+                        ]
+                    ),
+                ),
+                (
+                    "y",
+                    models.IntegerField(
+                        validators=[
+                            django.core.validators.MinValueValidator(0),
+                            django.core.validators.MaxValueValidator(8),
+                        ]
+                    ),
+                ),
+                (
+                    "orientation",
+                    models.CharField(
+                        blank=True,
+                        choices=[("H", "Horizontal"), ("V", "Vertical")],
+                        default="",
+                        max_length=1,
+                    ),
+                ),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+                (
+                    "game",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="moves",
+                        to="quoridor.game",
+                    ),
+                ),
+            ],
+            options={
+                "ordering": ["seq"],
+                "unique_together": {("game", "seq")},
+            },
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 5.2 on 2026-10-17 18:31
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("quoridor", "0006_move_gamesnapshot"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="game",
+            name="position",
+            field=models.BinaryField(blank=True, null=True),
+        ),
+    ]
@@ -37,6 +37,15 @@ class Game(models.Model):
         related_name='player2_games'
     )
 
+    # Name of the built-in bot playing as player 2 (see quoridor.ai.BOTS), blank for a human
+    player2_bot = models.CharField(max_length=20, blank=True, default='')
+
+    # Bumped by the engine on every committed move; clients resume streams from it
+    state_version = models.PositiveIntegerField(default=0)
+
+    # Position.to_bytes() after the latest move, empty until the first one
+    position = models.BinaryField(null=True, blank=True)
+
     def __str__(self):
         return f"Game {self.id} - {self.get_status_display()}"
     
@@ -101,4 +110,34 @@ class Fence(models.Model):
     player_id = models.CharField(max_length=20)
     x = models.IntegerField(validators=[MinValueValidator(0), MaxValueValidator(7)])
     y = models.IntegerField(validators=[MinValueValidator(0), MaxValueValidator(7)])
-    orientation = models.CharField(max_length=1, choices=ORIENTATION_CHOICES)
\ No newline at end of file
+    orientation = models.CharField(max_length=1, choices=ORIENTATION_CHOICES)
+
+class Move(models.Model):
+    """Append-only log of committed actions; seq matches the game's state_version after the move"""
+    KIND_CHOICES = [('PAWN', 'Pawn move'), ('FENCE', 'Fence placement')]
+
+    class Meta:
+        unique_together = ('game', 'seq')
+        ordering = ['seq']
+
+    game = models.ForeignKey(Game, on_delete=models.CASCADE, related_name='moves')
+    seq = models.PositiveIntegerField()
+    player_id = models.CharField(max_length=20)
+    kind = models.CharField(max_length=5, choices=KIND_CHOICES)
+    # Pawn moves record the square the pawn landed on, after any jump
+    x = models.IntegerField(validators=[MinValueValidator(0), MaxValueValidator(8)])
+    y = models.IntegerField(validators=[MinValueValidator(0), MaxValueValidator(8)])
+    orientation = models.CharField(max_length=1, choices=Fence.ORIENTATION_CHOICES, blank=True, default='')
+    created_at = models.DateTimeField(auto_now_add=True)
+
+
+class GameSnapshot(models.Model):
+    """Board state after move seq, so loading a long game only replays the log after it"""
+    class Meta:
+        unique_together = ('game', 'seq')
+
+    game = models.ForeignKey(Game, on_delete=models.CASCADE, related_name='snapshots')
+    seq = models.PositiveIntegerField()
+    # {"pawns": [[x, y], ...], "fences_left": [...], "fences": [[x, y, orientation, player_id], ...]}
+    state = models.JSONField()
+    created_at = models.DateTimeField(auto_now_add=True)
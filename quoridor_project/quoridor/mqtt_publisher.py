@@ -1,6 +1,12 @@
 import paho.mqtt.client as mqtt_client
+import itertools
 import json
+import random
+import time
+from collections import Counter, OrderedDict
+from typing import Callable, Optional
 from django.conf import settings
+from django.utils.module_loading import import_string
 from .models import Device
 import threading
 
@@ -8,32 +14,96 @@ class QuoridorMQTTPublisher:
     _client = None
     _lock = threading.Lock()
     _connected = False
+    _thread = None
+    _session_started = False
+    _stopping = threading.Event()
 
     @classmethod
-    def _get_client(cls):
-        if cls._client is None:
-            with cls._lock:
-                if cls._client is None:
-                    print("Initializing MQTT client...")
-                    cls._client = mqtt_client.Client()
-                    cls._client.on_connect = cls._on_connect
-                    try:
-                        print(f"Connecting to {settings.MQTT_CONFIG['BROKER_HOST']}:{settings.MQTT_CONFIG['BROKER_PORT']}")
-                        cls._client.connect(
-                            settings.MQTT_CONFIG['BROKER_HOST'],
-                            port=settings.MQTT_CONFIG['BROKER_PORT']
-                        )
-                        cls._client.loop_start()
-                        print("MQTT connection initiated")
-                    except Exception as e:
-                        print(f"MQTT connection failed: {e}")
-                        raise
-        return cls._client
-    
+    def start(cls):
+        """Start connecting in the background; safe to call more than once."""
+        with cls._lock:
+            if cls._thread is not None:
+                return
+            print("Initializing MQTT client...")
+            # A dotted path, so tests can swap in quoridor.fake_broker.InMemoryClient.
+            client_factory = import_string(settings.MQTT_CONFIG.get('CLIENT_FACTORY', 'paho.mqtt.client.Client'))
+            cls._stopping.clear()
+            cls._client = client_factory()
+            cls._client.on_connect = cls._on_connect
+            cls._client.on_disconnect = cls._on_disconnect
+            cls._thread = threading.Thread(target=cls._connection_loop, name='mqtt-connection', daemon=True)
+            cls._thread.start()
+
+    @classmethod
+    def start_for_server(cls):
+        """
+        Connect at server startup so no request ever waits on the broker.
+        Only the WSGI/ASGI entry points call this; management commands and
+        tests connect lazily on their first publish, if they publish at all.
+        """
+        if settings.MQTT_CONFIG.get('CONNECT_ON_STARTUP', True):
+            cls.start()
+
+    @classmethod
+    def stop(cls):
+        """Disconnect and stop the connection thread; start() may be called again afterwards."""
+        with cls._lock:
+            thread, cls._thread = cls._thread, None
+            if thread is None:
+                return
+            cls._stopping.set()
+            cls._client.disconnect()
+        thread.join()
+        cls._set_connected(False)
+
+    @classmethod
+    def _connection_loop(cls):
+        """
+        Keep the broker connection up, retrying with jittered exponential
+        backoff. Runs the client's network loop itself, so nothing else
+        ever blocks on a connect.
+        """
+        config = settings.MQTT_CONFIG
+        max_delay = config.get('RECONNECT_MAX_DELAY', 60)
+        delay = min_delay = config.get('RECONNECT_MIN_DELAY', 1)
+        while not cls._stopping.is_set():
+            cls._session_started = False
+            try:
+                print(f"Connecting to {config['BROKER_HOST']}:{config['BROKER_PORT']}")
+                cls._client.connect(
+                    config['BROKER_HOST'],
+                    port=config['BROKER_PORT'],
+                    keepalive=config.get('KEEP_ALIVE', 60)
+                )
+                rc = mqtt_client.MQTT_ERR_SUCCESS
+                while rc == mqtt_client.MQTT_ERR_SUCCESS and not cls._stopping.is_set():
+                    rc = cls._client.loop(timeout=1.0)
+            except Exception as e:
+                print(f"MQTT connection failed: {e}")
+            cls._set_connected(False)
+
+            delay = min_delay if cls._session_started else min(delay * 2, max_delay)
+            # Full jitter keeps a fleet of workers from reconnecting in lockstep.
+            cls._stopping.wait(random.uniform(0, delay))
+
+    @classmethod
+    def _set_connected(cls, connected):
+        cls._connected = connected
+        outbound_queue.set_online(connected)
+
     @classmethod
     def _on_connect(cls, client, userdata, flags, rc):
-        cls._connected = True
-        print("MQTT Connected")
+        if rc == 0:
+            cls._session_started = True
+            cls._set_connected(True)
+            print("MQTT Connected")
+        else:
+            print(f"MQTT connection refused: {mqtt_client.connack_string(rc)}")
+
+    @classmethod
+    def _on_disconnect(cls, client, userdata, rc):
+        cls._set_connected(False)
+        print(f"MQTT Disconnected ({rc})")
 
     @staticmethod
     def _get_device_topic(device, message_type):
@@ -41,44 +111,173 @@ class QuoridorMQTTPublisher:
             raise ValueError("Invalid device")
         return f"{settings.MQTT_CONFIG['TOPIC_PREFIX']}{device.device_id}/{message_type}"
 
+    @classmethod
+    def _send(cls, topic, payload, qos, retain):
+        """Hand one message to the client; runs on the outbound queue's thread."""
+        if not (cls._client and cls._connected):
+            raise ConnectionError("MQTT client not connected")
+        info = cls._client.publish(topic=topic, payload=payload, qos=qos, retain=retain)
+        if info.rc != mqtt_client.MQTT_ERR_SUCCESS:
+            raise ConnectionError(mqtt_client.error_string(info.rc))
+
     @staticmethod
-    def publish_turn(device, is_players_turn):
-        print(f"Attempting to publish turn notification to {device.device_id}")
+    def _enqueue(device, message_type, payload, coalesce=False, retain=False):
+        """Queue a message for the device; coalesced types keep only their newest unsent message."""
         try:
-            client = QuoridorMQTTPublisher._get_client()
-            if client and QuoridorMQTTPublisher._connected:
-                print("Client connected, publishing...")
-                client.publish(
-                    topic=QuoridorMQTTPublisher._get_device_topic(device, "turn"),
-                    payload=json.dumps({"is_players_turn": is_players_turn}),
-                    qos=1
-                )
-                print("Publish successful")
-        except Exception as e:
+            topic = QuoridorMQTTPublisher._get_device_topic(device, message_type)
+        except ValueError as e:
             print(f"MQTT publish error: {e}")
+            return
+        QuoridorMQTTPublisher.start()
+        outbound_queue.put(topic, payload, qos=1, retain=retain, coalesce_key=topic if coalesce else None)
+
+    @staticmethod
+    def publish_turn(device, is_players_turn):
+        QuoridorMQTTPublisher._enqueue(
+            device, "turn", json.dumps({"is_players_turn": is_players_turn}), coalesce=True
+        )
 
     @staticmethod
     def publish_move_validity(device, is_valid):
-        try:
-            client = QuoridorMQTTPublisher._get_client()
-            if client and QuoridorMQTTPublisher._connected:
-                client.publish(
-                    topic=QuoridorMQTTPublisher._get_device_topic(device, "move"),
-                    payload=json.dumps({"is_valid": is_valid}),
-                    qos=1
-                )
-        except Exception as e:
-            print(f"MQTT publish error: {e}")
+        QuoridorMQTTPublisher._enqueue(device, "move", json.dumps({"is_valid": is_valid}))
+
+    @staticmethod
+    def publish_position(device, position):
+        """Publish the board as Position.to_bytes(), retained so a reconnecting device gets it."""
+        QuoridorMQTTPublisher._enqueue(device, "position", position, coalesce=True, retain=True)
 
     @staticmethod
     def publish_game_result(device, did_win):
-        try:
-            client = QuoridorMQTTPublisher._get_client()
-            if client and QuoridorMQTTPublisher._connected:
-                client.publish(
-                    topic=QuoridorMQTTPublisher._get_device_topic(device, "game"),
-                    payload=json.dumps({"did_win": did_win}),
-                    qos=1
-                )
-        except Exception as e:
-            print(f"MQTT publish error: {e}")
\ No newline at end of file
+        QuoridorMQTTPublisher._enqueue(device, "game", json.dumps({"did_win": did_win}))
+
+
+class OutboundQueue:
+    """
+    Bounded queue of outgoing MQTT messages, sent by one background thread.
+
+    Nothing is sent while the queue is offline; messages wait, still
+    bounded, and a message whose send fails for lack of a connection goes
+    back to the front to be retried once the connection is back.
+
+    Messages go out in the order they were queued, which keeps each
+    device's messages in order. A message queued with a coalesce key
+    replaces any unsent one with the same key (e.g. a device's turn state),
+    moving to the back of the queue. When more than max_pending messages
+    are waiting, the oldest is dropped. Counters and send latency are
+    exposed through stats().
+    """
+
+    def __init__(self, send: Callable[[str, object, int, bool], None], max_pending: int = 1000,
+                 online: bool = True, clock: Callable[[], float] = time.monotonic):
+        self._send = send
+        self._online = online
+        self.max_pending = max_pending
+        self._clock = clock
+        self._pending = OrderedDict()
+        self._latest = {}
+        self._order = itertools.count()
+        self._in_flight = False
+        self._condition = threading.Condition()
+        self._thread = None
+        self._counts = Counter()
+        self._latency_total = 0.0
+        self._latency_max = 0.0
+
+    def put(self, topic: str, payload, qos: int = 1, retain: bool = False,
+            coalesce_key: Optional[str] = None) -> None:
+        """Queue a message without waiting for the broker."""
+        with self._condition:
+            if coalesce_key is not None:
+                superseded = self._latest.pop(coalesce_key, None)
+                if superseded is not None and self._pending.pop(superseded, None) is not None:
+                    self._counts['coalesced'] += 1
+            order = next(self._order)
+            self._pending[order] = (topic, payload, qos, retain, coalesce_key, self._clock())
+            if coalesce_key is not None:
+                self._latest[coalesce_key] = order
+            self._counts['queued'] += 1
+
+            while len(self._pending) > self.max_pending:
+                self._forget(*self._pending.popitem(last=False))
+                self._counts['dropped'] += 1
+
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name='mqtt-outbound', daemon=True)
+                self._thread.start()
+            self._condition.notify_all()
+
+    def set_online(self, online: bool) -> None:
+        """Resume or pause sending, e.g. as the broker connection comes and goes."""
+        with self._condition:
+            self._online = online
+            self._condition.notify_all()
+
+    def _forget(self, order: int, message: tuple) -> None:
+        """Clear the coalesce index entry of a message leaving the queue."""
+        coalesce_key = message[4]
+        if coalesce_key is not None and self._latest.get(coalesce_key) == order:
+            del self._latest[coalesce_key]
+
+    def _requeue(self, order: int, message: tuple) -> None:
+        """Put an unsent message back at the front, unless a newer one superseded it."""
+        coalesce_key = message[4]
+        if coalesce_key is not None:
+            if coalesce_key in self._latest:
+                self._counts['coalesced'] += 1
+                return
+            self._latest[coalesce_key] = order
+        self._pending[order] = message
+        self._pending.move_to_end(order, last=False)
+
+    def stats(self) -> dict:
+        """Counters, queue depth and send latency (seconds from put to sent)."""
+        with self._condition:
+            sent = self._counts['sent']
+            return {
+                **{name: self._counts[name] for name in ('queued', 'sent', 'coalesced', 'dropped', 'failed', 'retried')},
+                'pending': len(self._pending),
+                'online': self._online,
+                'latency_avg': self._latency_total / sent if sent else 0.0,
+                'latency_max': self._latency_max,
+            }
+
+    def join(self, timeout: Optional[float] = None) -> bool:
+        """Wait until every queued message has been handled; False on timeout."""
+        with self._condition:
+            return self._condition.wait_for(lambda: not self._pending and not self._in_flight, timeout)
+
+    def _run(self) -> None:
+        while True:
+            with self._condition:
+                while not (self._pending and self._online):
+                    self._condition.wait()
+                order, message = self._pending.popitem(last=False)
+                self._forget(order, message)
+                self._in_flight = True
+            topic, payload, qos, retain, _coalesce_key, queued_at = message
+            try:
+                self._send(topic, payload, qos, retain)
+                outcome = 'sent'
+            except ConnectionError:
+                outcome = 'retried'
+            except Exception as e:
+                print(f"MQTT publish error on {topic}: {e}")
+                outcome = 'failed'
+            with self._condition:
+                self._counts[outcome] += 1
+                if outcome == 'retried':
+                    self._online = False
+                    self._requeue(order, message)
+                elif outcome == 'sent':
+                    latency = self._clock() - queued_at
+                    self._latency_total += latency
+                    self._latency_max = max(self._latency_max, latency)
+                self._in_flight = False
+                self._condition.notify_all()
+
+
+outbound_queue = OutboundQueue(
+    QuoridorMQTTPublisher._send,
+    max_pending=settings.MQTT_CONFIG.get('MAX_PENDING', 1000),
+    online=False
+)
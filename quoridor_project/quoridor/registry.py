@@ -0,0 +1,154 @@
+import sys
+import threading
+import time
+from collections import OrderedDict
+from typing import Awaitable, Callable, Optional
+
+from django.conf import settings
+
+from .events import game_events
+from .game import QuoridorEngine
+from .models import Game
+
+
+def estimate_engine_size(engine: QuoridorEngine) -> int:
+    """Rough resident size of a live engine in bytes."""
+    position = engine.position
+    size = sum(
+        sys.getsizeof(part)
+        for part in (engine, position, position.pawns, position.walls, position.wall_sets, engine.fences)
+    )
+    # Each ORM row carries its own __dict__ and model state.
+    rows = len(engine.fences) + len(engine.moves) + len(engine.player_states) + 1
+    return size + rows * 1024
+
+
+class EngineRegistry:
+    """
+    Process-wide cache of live engines keyed by game ID.
+
+    A hit is checked against the game row's state_version, one indexed
+    query, and reloaded if another engine (after a discard or eviction, or
+    in another worker process) has committed since; otherwise the game is
+    served from memory. Engines are evicted least
+    recently used first once the registry holds more than ``max_engines`` or
+    its estimated size passes ``max_bytes``, and any engine idle for longer
+    than ``ttl_seconds`` is dropped. Engines write every committed move to
+    the database themselves, so eviction never loses state.
+    """
+
+    def __init__(self, max_engines: int = 256, ttl_seconds: float = 900,
+                 max_bytes: Optional[int] = None,
+                 loader: Callable[[int], QuoridorEngine] = QuoridorEngine,
+                 aloader: Callable[[int], Awaitable[QuoridorEngine]] = QuoridorEngine.aload,
+                 clock: Callable[[], float] = time.monotonic):
+        self.max_engines = max_engines
+        self.ttl_seconds = ttl_seconds
+        self.max_bytes = max_bytes
+        self._loader = loader
+        self._aloader = aloader
+        self._clock = clock
+        self._engines = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @classmethod
+    def from_settings(cls) -> 'EngineRegistry':
+        """Build a registry configured by settings.ENGINE_REGISTRY."""
+        config = getattr(settings, 'ENGINE_REGISTRY', {})
+        return cls(
+            max_engines=config.get('MAX_ENGINES', 256),
+            ttl_seconds=config.get('TTL_SECONDS', 900),
+            max_bytes=config.get('MAX_BYTES'),
+        )
+
+    def __len__(self) -> int:
+        return len(self._engines)
+
+    def __contains__(self, game_id: int) -> bool:
+        return int(game_id) in self._engines
+
+    def get(self, game_id: int) -> QuoridorEngine:
+        """Return the live engine for a game, loading it from the database on a miss."""
+        game_id = int(game_id)
+        now = self._clock()
+        engine = self._lookup(game_id, now)
+        stored = Game.objects.filter(id=game_id).values_list('state_version', flat=True).first()
+        if engine is not None and engine.game.state_version == stored:
+            return engine
+        # Load outside the lock so one slow query does not stall every game.
+        return self._store(game_id, self._loader(game_id), now, stale=engine)
+
+    async def aget(self, game_id: int) -> QuoridorEngine:
+        """Async counterpart of get; a miss loads the engine through the async ORM."""
+        game_id = int(game_id)
+        now = self._clock()
+        engine = self._lookup(game_id, now)
+        stored = await Game.objects.filter(id=game_id).values_list('state_version', flat=True).afirst()
+        if engine is not None and engine.game.state_version == stored:
+            return engine
+        return self._store(game_id, await self._aloader(game_id), now, stale=engine)
+
+    def _lookup(self, game_id: int, now: float) -> Optional[QuoridorEngine]:
+        """Return a live cached engine and mark it used, or None on a miss."""
+        with self._lock:
+            entry = self._engines.get(game_id)
+            if entry is None or now - entry[1] > self.ttl_seconds:
+                return None
+            self._engines[game_id] = (entry[0], now)
+            self._engines.move_to_end(game_id)
+            self.hits += 1
+            return entry[0]
+
+    def _store(self, game_id: int, engine: QuoridorEngine, now: float,
+               stale: Optional[QuoridorEngine] = None) -> QuoridorEngine:
+        """
+        Cache a freshly loaded engine in place of stale, preferring one a
+        concurrent request cached first.
+        """
+        with self._lock:
+            self.misses += 1
+            entry = self._engines.get(game_id)
+            if entry is not None and entry[0] is not stale and now - entry[1] <= self.ttl_seconds:
+                engine = entry[0]
+            self._engines[game_id] = (engine, now)
+            self._engines.move_to_end(game_id)
+            self._evict(now)
+        # The engine that started a pending bot turn may be gone (discarded,
+        # evicted, or a restarted process), so every load picks it back up.
+        engine.resume_bot_turn()
+        return engine
+
+    def discard(self, game_id: int) -> None:
+        """Drop a game's engine, e.g. after a failed commit left it suspect."""
+        with self._lock:
+            self._engines.pop(int(game_id), None)
+        game_events.forget(int(game_id))
+
+    def clear(self) -> None:
+        """Drop every engine."""
+        with self._lock:
+            self._engines.clear()
+        game_events.clear()
+
+    def _evict(self, now: float) -> None:
+        """Apply TTL, count and memory limits, oldest entries first."""
+        for game_id, (_engine, last_used) in list(self._engines.items()):
+            if now - last_used > self.ttl_seconds:
+                del self._engines[game_id]
+                game_events.forget(game_id)
+
+        while len(self._engines) > self.max_engines:
+            game_id, _entry = self._engines.popitem(last=False)
+            game_events.forget(game_id)
+
+        if self.max_bytes is not None:
+            total = sum(estimate_engine_size(engine) for engine, _ in self._engines.values())
+            while len(self._engines) > 1 and total > self.max_bytes:
+                game_id, (engine, _last_used) = self._engines.popitem(last=False)
+                total -= estimate_engine_size(engine)
+                game_events.forget(game_id)
+
+
+engine_registry = EngineRegistry.from_settings()
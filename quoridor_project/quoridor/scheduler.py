@@ -0,0 +1,56 @@
+import heapq
+import itertools
+import threading
+import time
+import traceback
+from typing import Callable
+
+
+class TurnScheduler:
+    """
+    Runs short callbacks at a later time on one background thread.
+
+    Callbacks due at the same moment run in the order they were scheduled,
+    so a game's queued device notifications keep their order. Callbacks
+    should be quick (e.g. an MQTT publish); slow work belongs elsewhere.
+    """
+
+    def __init__(self, clock: Callable[[], float] = time.monotonic):
+        self._clock = clock
+        self._queue = []
+        self._counter = itertools.count()
+        self._condition = threading.Condition()
+        self._thread = None
+
+    def call_at(self, when: float, callback: Callable, *args) -> None:
+        """Run callback(*args) once the clock reaches when."""
+        with self._condition:
+            heapq.heappush(self._queue, (when, next(self._counter), callback, args))
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name='turn-scheduler', daemon=True)
+                self._thread.start()
+            self._condition.notify()
+
+    def call_later(self, delay: float, callback: Callable, *args) -> None:
+        """Run callback(*args) after delay seconds."""
+        self.call_at(self._clock() + delay, callback, *args)
+
+    def pending(self) -> int:
+        """Number of callbacks not yet run."""
+        with self._condition:
+            return len(self._queue)
+
+    def _run(self) -> None:
+        while True:
+            with self._condition:
+                while not self._queue or self._queue[0][0] > self._clock():
+                    timeout = self._queue[0][0] - self._clock() if self._queue else None
+                    self._condition.wait(timeout)
+                _when, _order, callback, args = heapq.heappop(self._queue)
+            try:
+                callback(*args)
+            except Exception:
+                traceback.print_exc()
+
+
+turn_scheduler = TurnScheduler()
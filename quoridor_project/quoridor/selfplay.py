@@ -0,0 +1,54 @@
+import random
+from typing import Optional
+
+from .ai import BOTS
+from .board import Position
+from .mcts import MCTSPlayer
+
+
+def create_bot(name: str, time_budget_ms: int, seed: Optional[int] = None):
+    """Instantiate a bot for headless play; MCTS stays in-process inside workers."""
+    if BOTS[name] is MCTSPlayer:
+        return MCTSPlayer(time_budget_ms=time_budget_ms, workers=1, seed=seed)
+    return BOTS[name](time_budget_ms=time_budget_ms)
+
+
+def play_game(game_index: int, player1: str, player2: str, time_budget_ms: int,
+              seed: int, opening_plies: int = 2, max_plies: int = 200) -> dict:
+    """
+    Play one bot-vs-bot game on a bare Position and return its record.
+
+    The first opening_plies moves are random pawn moves drawn from seed so
+    that deterministic bots still produce varied games. A game that reaches
+    max_plies is recorded with no winner.
+    """
+    rng = random.Random(seed)
+    bots = (
+        create_bot(player1, time_budget_ms, rng.getrandbits(32)),
+        create_bot(player2, time_budget_ms, rng.getrandbits(32)),
+    )
+    position = Position()
+    moves = []
+    winner = None
+
+    while len(moves) < max_plies:
+        player = position.to_move
+        if len(moves) < opening_plies:
+            move = rng.choice(position.pawn_moves(player))
+        else:
+            move = bots[player].choose_move(position)
+        position.play(move)
+        moves.append(move)
+        if position.is_goal(player):
+            winner = player
+            break
+
+    return {
+        'game': game_index,
+        'seed': seed,
+        'players': [player1, player2],
+        'winner': winner,
+        'plies': len(moves),
+        'moves': moves,
+    }
+
@@ -286,9 +286,7 @@ function showWinnerModal(winnerName) {
     });
 }
 
-document.addEventListener('DOMContentLoaded', async () => {
-    initializeBoard();
-    
+async function loadGameState() {
     try {
         const response = await fetch(`${API_BASE}/api/game/${GAME_ID}/state/`);
         const state = await response.json();
@@ -296,6 +294,23 @@ document.addEventListener('DOMContentLoaded', async () => {
     } catch (error) {
         console.error('Failed to load game state:', error);
     }
+}
+
+document.addEventListener('DOMContentLoaded', async () => {
+    initializeBoard();
+    await loadGameState();
+
+    // The stream sends every change as it is committed. On reconnect the
+    // browser sends Last-Event-ID, so only newer states arrive. Servers that
+    // cannot stream (WSGI) refuse it, and the fetched state is used instead.
+    const stateStream = new EventSource(`${API_BASE}/api/game/${GAME_ID}/stream/`);
+    stateStream.addEventListener('state', (event) => {
+        renderGameState(JSON.parse(event.data));
+    });
+    stateStream.onerror = (error) => {
+        console.error('Game state stream interrupted:', error);
+        loadGameState();
+    };
 });
 
 movePawnBtn.addEventListener('click', () => setMode('movePawn'));
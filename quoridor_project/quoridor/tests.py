@@ -1,3 +1,903 @@
-from django.test import TestCase
+import asyncio
+import json
+import os
+import tempfile
+import threading
+import time
+from io import StringIO
+from unittest import mock
 
-# Create your tests here.
+from django.conf import settings
+from django.core.management import call_command
+from django.test import SimpleTestCase, TestCase, TransactionTestCase
+
+from .board import Position, POSITION_BYTES, fence_bit, PLAYER_ONE, PLAYER_TWO, square, coords, fence_move, decode_fence, is_fence_move
+from .ai import AlphaBetaPlayer
+from .benchmarks import run_benchmarks, compare, seeded_game, _apply
+from .events import GameEventBroker
+from .fence_analysis import evaluate_fences, UNREACHABLE
+from .mcts import MCTSPlayer, search_tree
+from .selfplay import play_game
+from .transposition import TranspositionTable, EXACT, LOWER_BOUND
+from .game import QuoridorEngine, StaleGameError
+from .fake_broker import InMemoryBroker, InMemoryClient
+from .mqtt_publisher import OutboundQueue, QuoridorMQTTPublisher, outbound_queue
+from .models import Game, PlayerState, Device, Move, GameSnapshot
+from .registry import EngineRegistry, engine_registry
+
+
+class PositionTests(SimpleTestCase):
+    def test_initial_pawns(self):
+        position = Position()
+        self.assertEqual(coords(position.pawns[PLAYER_ONE]), (4, 0))
+        self.assertEqual(coords(position.pawns[PLAYER_TWO]), (4, 8))
+
+    def test_binary_round_trip(self):
+        position = Position()
+        for move in seeded_game(2)[:30]:
+            position.play(move)
+        data = position.to_bytes()
+        self.assertEqual(len(data), POSITION_BYTES)
+        decoded = Position.from_bytes(data)
+        self.assertEqual(decoded.key, position.key)
+        self.assertEqual(decoded.walls, position.walls)
+        self.assertEqual(decoded.to_bytes(), data)
+        with self.assertRaises(ValueError):
+            Position.from_bytes(data[:-1])
+
+    def test_from_bytes_rejects_impossible_fences(self):
+        crossing = Position(h_fences=fence_bit(2, 2), v_fences=fence_bit(2, 2))
+        overlapping = Position(h_fences=fence_bit(2, 2) | fence_bit(3, 2))
+        boxed_in = Position(h_fences=fence_bit(4, 0), v_fences=fence_bit(3, 0) | fence_bit(5, 0))
+        for position in (crossing, overlapping, boxed_in):
+            with self.assertRaises(ValueError):
+                Position.from_bytes(position.to_bytes())
+
+    def test_horizontal_fence_blocks_both_columns(self):
+        position = Position()
+        position.add_fence('H', 3, 0)
+        self.assertTrue(position.is_blocked(square(3, 0), square(3, 1)))
+        self.assertTrue(position.is_blocked(square(4, 1), square(4, 0)))
+        self.assertFalse(position.is_blocked(square(5, 0), square(5, 1)))
+        self.assertFalse(position.is_blocked(square(3, 0), square(4, 0)))
+
+    def test_vertical_fence_blocks_both_rows(self):
+        position = Position()
+        position.add_fence('V', 3, 0)
+        self.assertTrue(position.is_blocked(square(3, 0), square(4, 0)))
+        self.assertTrue(position.is_blocked(square(4, 1), square(3, 1)))
+        self.assertFalse(position.is_blocked(square(3, 2), square(4, 2)))
+
+    def test_path_exists_until_sealed(self):
+        position = Position(pawns=(square(0, 0), square(4, 8)))
+        position.add_fence('H', 0, 0)
+        self.assertTrue(position.path_exists(PLAYER_ONE))
+        position.add_fence('V', 0, 0)
+        self.assertFalse(position.path_exists(PLAYER_ONE))
+        self.assertTrue(position.path_exists(PLAYER_TWO))
+
+    def test_wall_table_tracks_fence_changes(self):
+        position = Position()
+        position.add_fence('H', 2, 4)
+        position.add_fence('H', 3, 4)
+        position.remove_fence('H', 2, 4)
+        self.assertFalse(position.is_blocked(square(2, 4), square(2, 5)))
+        self.assertTrue(position.is_blocked(square(3, 4), square(3, 5)))
+        rebuilt = Position(h_fences=position.h_fences)
+        self.assertEqual(position.walls, rebuilt.walls)
+        self.assertEqual(position.fence_may_disconnect('H', 1, 4), rebuilt.fence_may_disconnect('H', 1, 4))
+
+    def test_fence_may_disconnect_only_when_closing_a_loop(self):
+        position = Position()
+        self.assertFalse(position.fence_may_disconnect('H', 3, 3))
+        self.assertFalse(position.fence_may_disconnect('H', 0, 3))
+        position.add_fence('H', 0, 3)
+        position.add_fence('H', 2, 3)
+        self.assertFalse(position.fence_may_disconnect('V', 3, 2))
+        position.add_fence('V', 3, 2)
+        self.assertTrue(position.fence_may_disconnect('V', 3, 0))
+        self.assertFalse(position.fence_may_disconnect('V', 5, 0))
+
+    def test_fence_may_disconnect_agrees_with_search(self):
+        position = Position()
+        for orientation, x, y in (('H', 0, 3), ('H', 2, 3), ('H', 4, 3), ('V', 5, 1)):
+            position.add_fence(orientation, x, y)
+        for orientation in 'HV':
+            for y in range(8):
+                for x in range(8):
+                    if position.fence_may_disconnect(orientation, x, y):
+                        continue
+                    trial = position.copy()
+                    trial.add_fence(orientation, x, y)
+                    self.assertTrue(trial.path_exists(PLAYER_ONE))
+                    self.assertTrue(trial.path_exists(PLAYER_TWO))
+
+    def test_pawn_moves_straight_and_side_jumps(self):
+        position = Position(pawns=(square(4, 4), square(4, 5)))
+        self.assertCountEqual(
+            position.pawn_moves(PLAYER_ONE),
+            [square(4, 6), square(5, 4), square(3, 4), square(4, 3)]
+        )
+        position.add_fence('H', 4, 5)
+        self.assertCountEqual(
+            position.pawn_moves(PLAYER_ONE),
+            [square(3, 5), square(5, 5), square(5, 4), square(3, 4), square(4, 3)]
+        )
+
+    def test_fence_moves_match_one_at_a_time_checks(self):
+        position = Position(pawns=(square(0, 0), square(4, 8)))
+        for orientation, x, y in (('H', 0, 0), ('H', 2, 3), ('H', 4, 3), ('V', 5, 1), ('V', 1, 1)):
+            position.add_fence(orientation, x, y)
+        expected = [
+            fence_move(orientation, x, y)
+            for orientation in 'HV' for y in range(8) for x in range(8)
+            if position.is_fence_legal(PLAYER_TWO, orientation, x, y)
+        ]
+        self.assertEqual(sorted(position.fence_moves(PLAYER_TWO)), sorted(expected))
+        self.assertNotIn(fence_move('V', 0, 0), expected)  # would seal player one in
+        self.assertNotIn(fence_move('V', 2, 3), expected)  # crosses H(2, 3)
+        self.assertNotIn(fence_move('H', 3, 3), expected)  # overlaps H(2, 3)
+
+    def test_play_applies_moves_and_passes_turn(self):
+        position = Position()
+        position.play(square(4, 1))
+        position.play(fence_move('V', 3, 3))
+        self.assertEqual(position.pawns[PLAYER_ONE], square(4, 1))
+        self.assertEqual(position.fences_left, [10, 9])
+        self.assertEqual(decode_fence(fence_move('V', 3, 3)), ('V', 3, 3))
+        self.assertTrue(position.has_fence('V', 3, 3))
+        self.assertEqual(position.to_move, PLAYER_ONE)
+
+    def test_copy_is_independent(self):
+        position = Position()
+        clone = position.copy()
+        clone.pawns[PLAYER_ONE] = square(4, 1)
+        clone.add_fence('V', 0, 0)
+        self.assertEqual(coords(position.pawns[PLAYER_ONE]), (4, 0))
+        self.assertEqual(position.v_fences, 0)
+
+    def test_key_is_incremental_and_order_independent(self):
+        first = Position()
+        for move in (square(4, 1), fence_move('H', 3, 3), fence_move('V', 0, 0), square(4, 7)):
+            first.play(move)
+            self.assertEqual(first.key, first._compute_key())
+        second = Position()
+        for move in (fence_move('V', 0, 0), fence_move('H', 3, 3), square(4, 1), square(4, 7)):
+            second.play(move)
+        self.assertEqual(first.key, second.key)
+        self.assertNotEqual(first.key, Position().key)
+        first.remove_fence('V', 0, 0)
+        self.assertEqual(first.key, first._compute_key())
+
+
+class TranspositionTableTests(SimpleTestCase):
+    def test_probe_returns_stored_entry(self):
+        table = TranspositionTable(size_bits=4)
+        table.store(0x1234, depth=3, score=7, bound=EXACT, best_move=10)
+        entry = table.probe(0x1234)
+        self.assertEqual((entry.depth, entry.score, entry.best_move), (3, 7, 10))
+        self.assertIsNone(table.probe(0x1235))
+
+    def test_replacement_prefers_depth_then_age(self):
+        table = TranspositionTable(size_bits=4)
+        table.store(0x10, depth=5, score=1, bound=EXACT)
+        table.store(0x20, depth=2, score=2, bound=LOWER_BOUND)
+        self.assertIsNotNone(table.probe(0x10))
+        self.assertIsNone(table.probe(0x20))
+        table.new_search()
+        table.store(0x20, depth=2, score=2, bound=LOWER_BOUND)
+        self.assertIsNone(table.probe(0x10))
+        self.assertEqual(table.probe(0x20).score, 2)
+
+
+class AlphaBetaPlayerTests(SimpleTestCase):
+    def test_takes_immediate_win(self):
+        position = Position(pawns=(square(2, 7), square(6, 1)))
+        self.assertEqual(AlphaBetaPlayer(time_budget_ms=200).choose_move(position), square(2, 8))
+
+    def test_blocks_opponent_about_to_win(self):
+        position = Position(pawns=(square(0, 2), square(4, 1)), fences_left=(10, 10), to_move=PLAYER_ONE)
+        move = AlphaBetaPlayer(time_budget_ms=300).choose_move(position)
+        child = position.copy()
+        child.play(move)
+        self.assertGreater(child.distance(PLAYER_TWO), 1)
+
+    def test_answers_within_budget(self):
+        bot = AlphaBetaPlayer(time_budget_ms=100)
+        started = time.monotonic()
+        bot.choose_move(Position())
+        self.assertLess(time.monotonic() - started, 0.5)
+
+
+class MCTSPlayerTests(SimpleTestCase):
+    def test_takes_immediate_win(self):
+        position = Position(pawns=(square(2, 7), square(6, 1)))
+        bot = MCTSPlayer(time_budget_ms=1000, workers=1, seed=7, max_iterations=300)
+        self.assertEqual(bot.choose_move(position), square(2, 8))
+
+    def test_search_tree_reports_root_visits(self):
+        stats, iterations = search_tree(Position(), time_budget_ms=1000, seed=3, max_iterations=50)
+        self.assertEqual(iterations, 50)
+        self.assertEqual(sum(visits for visits, _wins in stats.values()), 50)
+
+    def test_root_parallel_merges_worker_visits(self):
+        bot = MCTSPlayer(time_budget_ms=2000, workers=2, seed=11, max_iterations=40)
+        move = bot.choose_move(Position())
+        self.assertEqual(bot.iterations, 80)
+        self.assertIn(move, Position().legal_moves(PLAYER_ONE))
+
+
+class SelfPlayTests(SimpleTestCase):
+    def test_play_game_replays_to_recorded_winner(self):
+        record = play_game(0, 'alphabeta', 'alphabeta', time_budget_ms=5, seed=42, max_plies=300)
+        position = Position()
+        for move in record['moves']:
+            self.assertIn(move, position.legal_moves(position.to_move))
+            position.play(move)
+        self.assertEqual(record['plies'], len(record['moves']))
+        if record['winner'] is not None:
+            self.assertTrue(position.is_goal(record['winner']))
+
+    def test_command_streams_one_line_per_game(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'games.jsonl')
+            call_command(
+                'self_play', games=3, workers=1, time_budget_ms=2, max_plies=20,
+                seed=5, output=path, stdout=StringIO()
+            )
+            with open(path) as output:
+                records = [json.loads(line) for line in output]
+        self.assertEqual(sorted(record['game'] for record in records), [0, 1, 2])
+
+
+class FenceAnalysisTests(SimpleTestCase):
+    def test_matches_per_fence_search(self):
+        position = Position(pawns=(square(0, 0), square(4, 8)))
+        for orientation, x, y in (('H', 0, 0), ('H', 2, 3), ('H', 4, 3), ('V', 5, 1)):
+            position.add_fence(orientation, x, y)
+        impact = evaluate_fences(position, PLAYER_TWO)
+        self.assertEqual(impact.baseline.tolist(), [11, 10])
+        for index, orientation in enumerate('HV'):
+            for y in range(8):
+                for x in range(8):
+                    legal = position.is_fence_legal(PLAYER_TWO, orientation, x, y)
+                    self.assertEqual(bool(impact.legal[index, y, x]), legal)
+                    if not legal:
+                        continue
+                    trial = position.copy()
+                    trial.add_fence(orientation, x, y)
+                    for player in (PLAYER_ONE, PLAYER_TWO):
+                        expected = len(trial.shortest_path(player)) - 1
+                        self.assertEqual(impact.distances[player, index, y, x], expected)
+
+    def test_sealing_fence_is_unreachable_and_illegal(self):
+        position = Position(pawns=(square(0, 0), square(4, 8)))
+        position.add_fence('H', 0, 0)
+        impact = evaluate_fences(position)
+        self.assertEqual(impact.distances[PLAYER_ONE, 1, 0, 0], UNREACHABLE)
+        self.assertFalse(impact.legal[1, 0, 0])
+        self.assertFalse(impact.legal[0, 0, 1])
+
+
+class QuoridorEngineTests(TestCase):
+    def setUp(self):
+        self.game = Game.objects.create(status='IN_PROGRESS')
+
+    def engine(self):
+        return QuoridorEngine(self.game.id)
+
+    def test_move_pawn_persists_position(self):
+        self.assertTrue(self.engine().move_pawn('player1', 4, 1))
+        move = Move.objects.get(game=self.game)
+        self.assertEqual((move.seq, move.kind, move.x, move.y), (1, 'PAWN', 4, 1))
+        self.assertEqual(self.engine().get_state()['players']['player1']['position'], [4, 1])
+        self.game.refresh_from_db()
+        self.assertEqual(self.game.current_player_id, 'player2')
+
+    def test_rejects_out_of_turn_and_blocked_moves(self):
+        engine = self.engine()
+        self.assertFalse(engine.move_pawn('player2', 4, 7))
+        self.assertTrue(engine.place_fence('player1', 4, 7, 'H'))
+        self.assertFalse(engine.move_pawn('player2', 4, 7))
+
+    def test_rejects_out_of_turn_fence_and_moves_after_win(self):
+        PlayerState.objects.filter(game=self.game, player_id='player1').update(pawn_position_x=3, pawn_position_y=7)
+        engine = self.engine()
+        self.assertFalse(engine.place_fence('player2', 0, 0, 'H'))
+        self.assertTrue(engine.move_pawn('player1', 3, 8))
+        self.assertEqual(engine.game.status, 'FINISHED')
+        self.assertFalse(engine.move_pawn('player2', 4, 7))
+        self.assertFalse(engine.place_fence('player2', 0, 0, 'H'))
+        self.assertEqual(Move.objects.filter(game=self.game).count(), 1)
+        self.assertEqual(engine.game.state_version, 1)
+
+    def test_place_fence_persists_and_reloads(self):
+        self.assertTrue(self.engine().place_fence('player1', 2, 3, 'V'))
+        self.assertEqual(Move.objects.filter(game=self.game, kind='FENCE').count(), 1)
+        engine = self.engine()
+        self.assertTrue(engine.position.has_fence('V', 2, 3))
+        self.assertEqual(engine.get_state()['players']['player1']['fences_remaining'], 9)
+        self.assertFalse(engine.place_fence('player2', 2, 3, 'V'))
+
+    def test_move_returns_before_turn_notification(self):
+        device = Device.objects.create(device_id='b827eb000001')
+        self.game.player1_device = device
+        self.game.save()
+        with mock.patch('quoridor.game.QuoridorMQTTPublisher') as publisher:
+            started = time.monotonic()
+            self.assertTrue(self.engine().move_pawn('player1', 4, 1))
+            self.assertLess(time.monotonic() - started, QuoridorEngine.TURN_TRANSITION_DELAY)
+            publisher.publish_turn.assert_not_called()
+            time.sleep(QuoridorEngine.TURN_TRANSITION_DELAY + 0.2)
+        publisher.publish_move_validity.assert_called_once_with(device, True)
+        publisher.publish_turn.assert_called_once_with(device, False)
+
+    def test_reload_from_snapshot_and_log_tail(self):
+        engine = self.engine()
+        moves = seeded_game(5)[:QuoridorEngine.SNAPSHOT_INTERVAL + 3]
+        for move in moves:
+            self.assertTrue(_apply(engine, move))
+        self.assertEqual(GameSnapshot.objects.get(game=self.game).seq, QuoridorEngine.SNAPSHOT_INTERVAL)
+        self.assertEqual(Move.objects.filter(game=self.game).count(), len(moves))
+
+        with self.assertNumQueries(5):
+            reloaded = self.engine()
+        self.assertEqual(reloaded.get_state(), engine.get_state())
+        self.assertEqual(reloaded.position.key, engine.position.key)
+
+    def test_changes_since_version(self):
+        engine = self.engine()
+        self.assertTrue(engine.move_pawn('player1', 4, 1))
+        self.assertTrue(engine.place_fence('player2', 0, 0, 'H'))
+        self.assertTrue(engine.move_pawn('player1', 4, 2))
+
+        self.assertEqual(engine.get_changes(1), {
+            'since': 1,
+            'version': 3,
+            'players': {'player2': {'fences_remaining': 9}, 'player1': {'position': [4, 2]}},
+            'fences': [{'x': 0, 'y': 0, 'orientation': 'H', 'player_id': 'player2'}],
+            'current_player': 'player2'
+        })
+        self.assertEqual(engine.get_changes(3), {'since': 3, 'version': 3})
+        self.assertIsNone(engine.get_changes(4))
+
+    def test_stale_engine_cannot_commit(self):
+        first, second = self.engine(), self.engine()
+        self.assertTrue(first.move_pawn('player1', 4, 1))
+        before = second.get_state()
+        with self.assertRaises(StaleGameError):
+            second.move_pawn('player1', 3, 0)
+        self.assertEqual(second.get_state(), before)
+        self.assertEqual((second.moves, second.position.pawns[PLAYER_ONE]), ([], square(4, 0)))
+        self.assertEqual(list(Move.objects.filter(game=self.game).values_list('x', 'y')), [(4, 1)])
+        self.game.refresh_from_db()
+        self.assertEqual((self.game.current_player_id, self.game.state_version), ('player2', 1))
+
+    def test_jump_over_opponent(self):
+        PlayerState.objects.filter(game=self.game, player_id='player2').update(pawn_position_y=1)
+        engine = self.engine()
+        self.assertTrue(engine.move_pawn('player1', 4, 1))
+        self.assertEqual(engine.get_state()['players']['player1']['position'], [4, 2])
+
+    def test_diagonal_side_jump(self):
+        PlayerState.objects.filter(game=self.game, player_id='player2').update(pawn_position_y=1)
+        engine = self.engine()
+        self.assertTrue(engine.place_fence('player1', 4, 1, 'H'))
+        self.assertIn((3, 1), list(engine.legal_pawn_moves('player1')))
+        engine.game.current_player_id = 'player1'
+        self.assertTrue(engine.move_pawn('player1', 3, 1))
+
+    def test_legal_moves_and_crossing_fence(self):
+        engine = self.engine()
+        moves = list(engine.legal_moves('player1'))
+        self.assertEqual(len(moves), 3 + 128)
+        self.assertTrue(engine.place_fence('player1', 2, 2, 'H'))
+        self.assertFalse(engine.place_fence('player2', 2, 2, 'V'))
+        self.assertFalse(engine.place_fence('player2', 1, 2, 'H'))
+        self.assertNotIn((1, 2, 'H'), list(engine.legal_fences('player2')))
+
+    def test_rejects_unknown_fence_orientation(self):
+        engine = self.engine()
+        for orientation in ('X', 'h'):
+            self.assertFalse(engine.place_fence('player1', 2, 2, orientation))
+        self.assertFalse(Move.objects.filter(game=self.game).exists())
+        self.assertFalse(engine.position.is_fence_legal(PLAYER_ONE, 'v', 2, 2))
+        with self.assertRaises(ValueError):
+            engine.position.add_fence('X', 2, 2)
+
+
+class BotTurnTests(TransactionTestCase):
+    """Bot turns run on a worker thread, so they need real commits to be visible."""
+
+    def setUp(self):
+        self.game = Game.objects.create(status='IN_PROGRESS', player2_bot='alphabeta')
+        engine_registry.clear()
+
+    def engine(self):
+        return QuoridorEngine(self.game.id)
+
+    def test_bot_replies_as_player_two(self):
+        engine = self.engine()
+        with self.settings(AI_CONFIG={'TIME_BUDGET_MS': 50}):
+            self.assertTrue(engine.move_pawn('player1', 4, 1))
+            engine._bot_future.result(timeout=5)
+        self.game.refresh_from_db()
+        self.assertEqual(self.game.current_player_id, 'player1')
+        engine = self.engine()
+        self.assertTrue(
+            engine.position.pawns[PLAYER_TWO] != square(4, 8) or engine.fences
+        )
+
+    def wait_for_bot(self):
+        deadline = time.monotonic() + 5
+        while time.monotonic() < deadline:
+            self.game.refresh_from_db()
+            if self.game.current_player_id == 'player1':
+                return
+            time.sleep(0.02)
+        self.fail('bot did not move')
+
+    def test_loading_game_on_bots_turn_resumes_it(self):
+        Game.objects.filter(id=self.game.id).update(current_player_id='player2')
+        with self.settings(AI_CONFIG={'TIME_BUDGET_MS': 50}):
+            engine_registry.get(self.game.id)
+            self.wait_for_bot()
+
+    def test_failed_bot_move_is_retried(self):
+        Game.objects.filter(id=self.game.id).update(current_player_id='player2')
+        with mock.patch.object(AlphaBetaPlayer, 'choose_move', side_effect=[RuntimeError, square(4, 7)]):
+            engine_registry.get(self.game.id)
+            self.wait_for_bot()
+        self.assertEqual(engine_registry.get(self.game.id).get_state()['players']['player2']['position'], [4, 7])
+
+
+class BenchmarkTests(TestCase):
+    def test_seeded_game_is_reproducible(self):
+        self.assertEqual(seeded_game(3), seeded_game(3))
+
+    def test_run_reports_every_benchmark_and_rolls_back(self):
+        games_before = Game.objects.count()
+        results = run_benchmarks(iterations=4)
+        self.assertEqual(
+            set(results['results']),
+            {'path_exists', 'legal_moves', 'move_pawn', 'place_fence', 'get_state', 'game_replay'}
+        )
+        for result in results['results'].values():
+            self.assertGreater(result['ops_per_sec'], 0)
+            self.assertLessEqual(result['p50_us'], result['p99_us'])
+        self.assertEqual(Game.objects.count(), games_before)
+
+    def test_compare_flags_throughput_drops(self):
+        baseline = {'results': {'a': {'ops_per_sec': 100.0}, 'b': {'ops_per_sec': 100.0}}}
+        current = {'results': {'a': {'ops_per_sec': 85.0}, 'b': {'ops_per_sec': 95.0}, 'c': {'ops_per_sec': 1.0}}}
+        comparison = compare(baseline, current, threshold=0.1)
+        self.assertTrue(comparison['a']['regression'])
+        self.assertFalse(comparison['b']['regression'])
+        self.assertIsNone(comparison['c'])
+
+
+class EngineRegistryTests(TestCase):
+    def setUp(self):
+        self.now = 0.0
+        self.registry = EngineRegistry(max_engines=2, ttl_seconds=60, clock=lambda: self.now)
+        self.games = [Game.objects.create(status='IN_PROGRESS') for _ in range(3)]
+        engine_registry.clear()
+
+    def test_hit_reuses_engine_after_version_check(self):
+        engine = self.registry.get(self.games[0].id)
+        with self.assertNumQueries(1):
+            self.assertIs(self.registry.get(self.games[0].id), engine)
+
+    def test_reloads_engine_another_engine_moved_past(self):
+        game_id = self.games[0].id
+        cached = self.registry.get(game_id)
+        self.assertTrue(QuoridorEngine(game_id).move_pawn('player1', 4, 1))
+        engine = self.registry.get(game_id)
+        self.assertIsNot(engine, cached)
+        self.assertEqual(engine.get_state()['players']['player1']['position'], [4, 1])
+        self.assertTrue(engine.move_pawn('player2', 4, 7))
+        self.assertIs(self.registry.get(game_id), engine)
+
+    def test_state_etag_follows_committed_version(self):
+        game_id = self.games[0].id
+        engine_registry.get(game_id)
+        self.assertTrue(QuoridorEngine(game_id).move_pawn('player1', 4, 1))
+        response = self.client.get(f'/api/game/{game_id}/state/', headers={'If-None-Match': '"v0"'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['players']['player1']['position'], [4, 1])
+
+    def test_evicts_least_recently_used(self):
+        first = self.registry.get(self.games[0].id)
+        self.registry.get(self.games[1].id)
+        self.registry.get(self.games[0].id)
+        self.registry.get(self.games[2].id)
+        self.assertNotIn(self.games[1].id, self.registry)
+        self.assertIs(self.registry.get(self.games[0].id), first)
+
+    def test_idle_engines_expire(self):
+        first = self.registry.get(self.games[0].id)
+        self.now = 61.0
+        self.assertIsNot(self.registry.get(self.games[0].id), first)
+
+    def test_memory_cap_keeps_most_recent(self):
+        registry = EngineRegistry(max_bytes=1, clock=lambda: self.now)
+        registry.get(self.games[0].id)
+        registry.get(self.games[1].id)
+        self.assertEqual(len(registry), 1)
+        self.assertIn(self.games[1].id, registry)
+
+    def test_views_serve_hot_games_from_memory(self):
+        game_id = self.games[0].id
+        response = self.client.post(
+            f'/api/game/{game_id}/move/', {'player_id': 'player1', 'x': 4, 'y': 1},
+            content_type='application/json'
+        )
+        self.assertEqual(response.status_code, 200)
+        with self.assertNumQueries(1):
+            state = self.client.get(f'/api/game/{game_id}/state/').json()
+        self.assertEqual(state['players']['player1']['position'], [4, 1])
+        self.assertEqual(Move.objects.get(game_id=game_id).y, 1)
+
+
+class AsyncViewTests(TestCase):
+    def setUp(self):
+        self.game = Game.objects.create(status='IN_PROGRESS')
+        engine_registry.clear()
+
+    async def test_async_move_and_fence_persist(self):
+        base = f'/api/async/game/{self.game.id}'
+        response = await self.async_client.post(
+            f'{base}/move/', {'player_id': 'player1', 'x': 4, 'y': 1},
+            content_type='application/json'
+        )
+        self.assertEqual(response.status_code, 200)
+        response = await self.async_client.post(
+            f'{base}/fence/', {'player_id': 'player2', 'x': 0, 'y': 0, 'orientation': 'H'},
+            content_type='application/json'
+        )
+        self.assertTrue(response.json()['success'])
+
+        state = (await self.async_client.get(f'{base}/state/')).json()
+        self.assertEqual(state['current_player'], 'player1')
+        self.assertEqual(state['players']['player2']['fences_remaining'], 9)
+        kinds = [move.kind async for move in Move.objects.filter(game=self.game)]
+        self.assertEqual(kinds, ['PAWN', 'FENCE'])
+
+    async def test_async_invalid_move_and_missing_game(self):
+        response = await self.async_client.post(
+            f'/api/async/game/{self.game.id}/move/', {'player_id': 'player2', 'x': 4, 'y': 7},
+            content_type='application/json'
+        )
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(response.json()['success'])
+        response = await self.async_client.get(f'/api/async/game/{self.game.id + 100}/state/')
+        self.assertEqual(response.status_code, 404)
+
+
+class GameEventBrokerTests(SimpleTestCase):
+    async def test_stream_skips_seen_versions_and_coalesces(self):
+        broker = GameEventBroker()
+        broker.publish(1, 3, {'turn': 'a'})
+        broker.publish(1, 2, {'turn': 'stale'})
+        stream = broker.stream(1, since=3)
+        next_frame = asyncio.ensure_future(anext(stream))
+        await asyncio.sleep(0.05)
+        self.assertFalse(next_frame.done())
+        self.assertEqual(broker.subscriber_count(1), 1)
+
+        broker.publish(1, 4, {'turn': 'b'})
+        broker.publish(1, 5, {'turn': 'c'})
+        frame = await asyncio.wait_for(next_frame, 1)
+        self.assertEqual(frame, 'id: 5\nevent: state\ndata: {"turn":"c"}\n\n')
+        await stream.aclose()
+        self.assertEqual(broker.subscriber_count(1), 0)
+
+
+class StateStreamTests(TestCase):
+    def setUp(self):
+        self.game = Game.objects.create(status='IN_PROGRESS')
+        engine_registry.clear()
+
+    async def test_stream_sends_current_state_then_changes(self):
+        response = await self.async_client.get(f'/api/game/{self.game.id}/stream/')
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+        frames = aiter(response.streaming_content)
+        first = (await asyncio.wait_for(anext(frames), 1)).decode()
+        self.assertTrue(first.startswith('id: 0\n'))
+
+        engine = await engine_registry.aget(self.game.id)
+        self.assertTrue(await engine.amove_pawn('player1', 4, 1))
+        second = (await asyncio.wait_for(anext(frames), 1)).decode()
+        state = json.loads(second.split('data: ', 1)[1])
+        self.assertEqual((state['version'], state['current_player']), (1, 'player2'))
+        await frames.aclose()
+
+    async def test_resume_from_current_version_waits_for_next(self):
+        engine = await engine_registry.aget(self.game.id)
+        self.assertTrue(await engine.amove_pawn('player1', 4, 1))
+        response = await self.async_client.get(
+            f'/api/game/{self.game.id}/stream/', headers={'Last-Event-ID': '1'}
+        )
+        frames = aiter(response.streaming_content)
+        pending = asyncio.ensure_future(anext(frames))
+        await asyncio.sleep(0.05)
+        self.assertFalse(pending.done())
+        self.assertTrue(await engine.amove_pawn('player2', 4, 7))
+        frame = (await asyncio.wait_for(pending, 1)).decode()
+        self.assertTrue(frame.startswith('id: 2\n'))
+        await frames.aclose()
+
+    def test_stream_refused_under_wsgi(self):
+        response = self.client.get(f'/api/game/{self.game.id}/stream/')
+        self.assertEqual(response.status_code, 501)
+
+
+class StateETagTests(TestCase):
+    def setUp(self):
+        self.game = Game.objects.create(status='IN_PROGRESS')
+        self.url = f'/api/game/{self.game.id}/state/'
+        engine_registry.clear()
+
+    def test_unchanged_state_answers_304(self):
+        etag = self.client.get(self.url)['ETag']
+        self.assertEqual(etag, '"v0"')
+        with self.assertNumQueries(1):
+            response = self.client.get(self.url, headers={'If-None-Match': etag})
+        self.assertEqual(response.status_code, 304)
+
+        engine_registry.clear()
+        with self.assertNumQueries(1):
+            response = self.client.get(self.url, headers={'If-None-Match': etag})
+        self.assertEqual(response.status_code, 304)
+        self.assertNotIn(self.game.id, engine_registry)
+
+    def test_move_changes_etag(self):
+        etag = self.client.get(self.url)['ETag']
+        self.client.post(
+            f'/api/game/{self.game.id}/move/', {'player_id': 'player1', 'x': 4, 'y': 1},
+            content_type='application/json'
+        )
+        response = self.client.get(self.url, headers={'If-None-Match': etag})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['ETag'], '"v1"')
+
+    def test_since_returns_delta_or_full_state(self):
+        self.client.post(
+            f'/api/game/{self.game.id}/move/', {'player_id': 'player1', 'x': 4, 'y': 1},
+            content_type='application/json'
+        )
+        delta = self.client.get(self.url, {'since': 0}).json()
+        self.assertEqual(delta['players'], {'player1': {'position': [4, 1]}})
+        self.assertNotIn('status', delta)
+        self.assertIn('status', self.client.get(self.url, {'since': 7}).json())
+        self.assertEqual(self.client.get(self.url, {'since': 'x'}).status_code, 400)
+
+    def test_binary_state_by_content_negotiation(self):
+        binary = {'Accept': 'application/vnd.quoridor.position'}
+        self.client.post(
+            f'/api/game/{self.game.id}/move/', {'player_id': 'player1', 'x': 4, 'y': 1},
+            content_type='application/json'
+        )
+        engine_registry.clear()
+        with self.assertNumQueries(1):
+            response = self.client.get(self.url, headers=binary)
+        self.assertEqual(response['Content-Type'], 'application/vnd.quoridor.position')
+        self.assertEqual(response['ETag'], '"v1.bin"')
+        position = Position.from_bytes(response.content)
+        self.assertEqual(coords(position.pawns[PLAYER_ONE]), (4, 1))
+        self.assertEqual(position.to_move, PLAYER_TWO)
+
+        response = self.client.get(self.url, headers={**binary, 'If-None-Match': '"v1"'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.client.get(self.url)['Content-Type'], 'application/json')
+
+    async def test_async_endpoint_honours_etag(self):
+        url = f'/api/async/game/{self.game.id}/state/'
+        etag = (await self.async_client.get(url))['ETag']
+        response = await self.async_client.get(url, headers={'If-None-Match': etag})
+        self.assertEqual(response.status_code, 304)
+
+
+class PlayActionsTests(TestCase):
+    def setUp(self):
+        self.game = Game.objects.create(status='IN_PROGRESS')
+        self.url = f'/api/game/{self.game.id}/actions/'
+        engine_registry.clear()
+
+    def post(self, actions):
+        return self.client.post(self.url, {'actions': actions}, content_type='application/json')
+
+    def test_replays_seeded_game_in_one_request(self):
+        actions = []
+        players = ['player1', 'player2']
+        for ply, move in enumerate(seeded_game(4)):
+            if is_fence_move(move):
+                orientation, x, y = decode_fence(move)
+                actions.append({'type': 'fence', 'player_id': players[ply % 2], 'x': x, 'y': y, 'orientation': orientation})
+            else:
+                x, y = coords(move)
+                actions.append({'type': 'move', 'player_id': players[ply % 2], 'x': x, 'y': y})
+        response = self.post(actions)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['applied'], len(actions))
+        self.assertEqual(response.json()['state']['status'], 'FINISHED')
+        self.assertEqual(Move.objects.filter(game=self.game).count(), len(actions))
+
+    def test_failure_applies_nothing(self):
+        before = self.client.get(f'/api/game/{self.game.id}/state/').json()
+        response = self.post([
+            {'type': 'move', 'player_id': 'player1', 'x': 4, 'y': 1},
+            {'type': 'fence', 'player_id': 'player2', 'x': 3, 'y': 3, 'orientation': 'H'},
+            {'type': 'fence', 'player_id': 'player1', 'x': 3, 'y': 3, 'orientation': 'V'},
+        ])
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json()['failed_index'], 2)
+        self.assertEqual(response.json()['state'], before)
+        self.assertFalse(Move.objects.filter(game=self.game).exists())
+        self.assertEqual(self.post([{'type': 'jump'}]).json()['failed_index'], 0)
+        self.assertEqual(self.post(5).status_code, 400)
+        for action in ({'type': 'move', 'player_id': 'player1', 'x': 4.7, 'y': 1},
+                       {'type': 'move', 'player_id': 'player1', 'x': 4, 'y': True},
+                       {'type': 'fence', 'player_id': 'player1', 'x': 2, 'y': 2, 'orientation': 'h'}):
+            response = self.post([action])
+            self.assertEqual((response.status_code, response.json()['failed_index']), (400, 0))
+        self.assertFalse(Move.objects.filter(game=self.game).exists())
+
+
+class OutboundQueueTests(SimpleTestCase):
+    def setUp(self):
+        self.sent = []
+        self.release = threading.Event()
+
+    def send(self, topic, payload, qos, retain):
+        if topic == 'hold':
+            self.release.wait(2)
+        self.sent.append((topic, payload))
+
+    def test_coalesces_superseded_turns_and_keeps_order(self):
+        outbound = OutboundQueue(self.send)
+        outbound.put('hold', 'x')
+        outbound.put('d1/turn', 'mine', coalesce_key='d1/turn')
+        outbound.put('d1/move', 'valid')
+        outbound.put('d1/turn', 'theirs', coalesce_key='d1/turn')
+        self.release.set()
+        self.assertTrue(outbound.join(2))
+        self.assertEqual(self.sent, [('hold', 'x'), ('d1/move', 'valid'), ('d1/turn', 'theirs')])
+        stats = outbound.stats()
+        self.assertEqual((stats['queued'], stats['sent'], stats['coalesced']), (4, 3, 1))
+
+    def test_drops_oldest_when_full_and_counts_failures(self):
+        outbound = OutboundQueue(self.send, max_pending=2)
+        outbound.put('hold', 'x')
+        while not outbound.stats()['pending'] == 0:
+            time.sleep(0.01)
+        for n in range(3):
+            outbound.put('d1/move', n)
+        self.release.set()
+        self.assertTrue(outbound.join(2))
+        self.assertEqual(self.sent[1:], [('d1/move', 1), ('d1/move', 2)])
+        self.assertEqual(outbound.stats()['dropped'], 1)
+
+        failing = OutboundQueue(mock.Mock(side_effect=ValueError))
+        failing.put('d1/move', 'valid')
+        self.assertTrue(failing.join(2))
+        self.assertEqual(failing.stats()['failed'], 1)
+
+    def test_buffers_while_offline_and_retries_after_disconnect(self):
+        send = mock.Mock(side_effect=[ConnectionError, None, None])
+        outbound = OutboundQueue(send, online=False)
+        outbound.put('d1/move', 'valid')
+        outbound.put('d1/turn', 'mine', coalesce_key='d1/turn')
+        self.assertFalse(outbound.join(0.1))
+        send.assert_not_called()
+
+        outbound.set_online(True)
+        # The first send hits a dropped connection: the queue pauses and keeps the message.
+        deadline = time.monotonic() + 2
+        while outbound.stats()['retried'] == 0 and time.monotonic() < deadline:
+            time.sleep(0.01)
+        self.assertEqual(outbound.stats()['pending'], 2)
+        self.assertFalse(outbound.stats()['online'])
+
+        outbound.set_online(True)
+        self.assertTrue(outbound.join(2))
+        self.assertEqual(
+            [c.args[:2] for c in send.call_args_list],
+            [('d1/move', 'valid'), ('d1/move', 'valid'), ('d1/turn', 'mine')]
+        )
+
+
+class InMemoryBrokerTests(SimpleTestCase):
+    def received(self, client):
+        messages = []
+        client.on_message = lambda _client, _userdata, message: messages.append(
+            (message.topic, message.payload, message.qos, message.retain)
+        )
+        return messages
+
+    def test_wildcards_retained_and_qos(self):
+        broker = InMemoryBroker()
+        publisher = InMemoryClient(broker=broker)
+        publisher.connect()
+        publisher.publish('quoridor/device/a/position', b'board', qos=1, retain=True)
+        publisher.publish('quoridor/device/a/turn', 'x', qos=1)
+
+        device = InMemoryClient(broker=broker)
+        messages = self.received(device)
+        device.connect()
+        device.subscribe([('quoridor/device/+/position', 1), ('quoridor/#', 0)])
+        publisher.publish('quoridor/device/a/move', '{}', qos=1)
+        publisher.publish('other/topic', 'ignored')
+        device.loop(0)
+        self.assertEqual(messages, [
+            ('quoridor/device/a/position', b'board', 1, True),
+            ('quoridor/device/a/position', b'board', 0, True),
+            ('quoridor/device/a/move', b'{}', 0, False),
+        ])
+
+        publisher.publish('quoridor/device/a/position', b'', retain=True)
+        self.assertIsNone(broker.retained('quoridor/device/a/position'))
+
+    def test_persistent_session_holds_qos1_messages(self):
+        broker = InMemoryBroker()
+        publisher = InMemoryClient(broker=broker)
+        publisher.connect()
+        device = InMemoryClient(client_id='lamp', clean_session=False, broker=broker)
+        messages = self.received(device)
+        device.connect()
+        device.subscribe('lamp/#', qos=1)
+        device.disconnect()
+
+        publisher.publish('lamp/turn', 'held', qos=1)
+        publisher.publish('lamp/turn', 'lost', qos=0)
+        device.connect()
+        device.loop(0)
+        self.assertEqual([payload for _topic, payload, _qos, _retain in messages], [b'held'])
+
+
+class EndToEndMQTTTests(TestCase):
+    """Move to device callback through the real publisher and the in-memory broker."""
+
+    def setUp(self):
+        QuoridorMQTTPublisher.stop()
+        config = {**settings.MQTT_CONFIG, 'CLIENT_FACTORY': 'quoridor.fake_broker.InMemoryClient'}
+        self.enterContext(self.settings(MQTT_CONFIG=config))
+        self.enterContext(mock.patch.object(QuoridorEngine, 'TURN_TRANSITION_DELAY', 0))
+        QuoridorMQTTPublisher.start()
+        self.addCleanup(QuoridorMQTTPublisher.stop)
+
+        self.devices = [Device.objects.create(device_id=f'e2e00000000{n}') for n in (1, 2)]
+        self.game = Game.objects.create(
+            status='IN_PROGRESS', player1_device=self.devices[0], player2_device=self.devices[1]
+        )
+        self.arrivals = []
+        lamp = InMemoryClient()
+        lamp.message_callback_add(
+            'quoridor/device/+/move', lambda *_args: self.arrivals.append(time.perf_counter())
+        )
+        lamp.connect()
+        lamp.subscribe('quoridor/device/#', qos=1)
+        lamp.loop_start()
+        self.addCleanup(lamp.loop_stop)
+
+        deadline = time.monotonic() + 2
+        while not outbound_queue.stats()['online'] and time.monotonic() < deadline:
+            time.sleep(0.01)
+
+    def test_move_notifications_reach_device(self):
+        engine = QuoridorEngine(self.game.id)
+        shuttle = [('player1', 4, 1), ('player2', 4, 7), ('player1', 4, 0), ('player2', 4, 8)]
+        sent = []
+        started = time.perf_counter()
+        for ply in range(40):
+            sent.append(time.perf_counter())
+            self.assertTrue(engine.move_pawn(*shuttle[ply % len(shuttle)]))
+        self.assertTrue(outbound_queue.join(5))
+
+        deadline = time.monotonic() + 2
+        while len(self.arrivals) < len(sent) and time.monotonic() < deadline:
+            time.sleep(0.01)
+        self.assertEqual(len(self.arrivals), len(sent))
+        latencies = sorted(arrived - move for move, arrived in zip(sent, self.arrivals))
+        self.assertLess(latencies[len(latencies) // 2], 0.5)
+        self.assertGreater(len(sent) / (self.arrivals[-1] - started), 10)
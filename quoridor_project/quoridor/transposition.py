@@ -0,0 +1,58 @@
+from typing import List, NamedTuple, Optional
+
+# Bound types for stored search scores.
+EXACT = 0
+LOWER_BOUND = 1
+UPPER_BOUND = 2
+
+
+class TTEntry(NamedTuple):
+    """One stored search result for a position key."""
+    key: int
+    depth: int
+    score: int
+    bound: int
+    best_move: Optional[int]
+    generation: int
+
+
+class TranspositionTable:
+    """
+    Fixed-size transposition table keyed by ``Position.key``.
+
+    Entries live in a power-of-two array indexed by the low bits of the key.
+    On a collision the slot is overwritten when it holds the same position,
+    was written by an earlier search generation, or was searched no deeper
+    than the new result; otherwise the deeper, current entry is kept.
+    """
+
+    def __init__(self, size_bits: int = 16):
+        self._mask = (1 << size_bits) - 1
+        self._slots: List[Optional[TTEntry]] = [None] * (1 << size_bits)
+        self.generation = 0
+
+    def __len__(self) -> int:
+        return sum(1 for entry in self._slots if entry is not None)
+
+    def new_search(self) -> None:
+        """Age existing entries so the next search may replace them freely."""
+        self.generation += 1
+
+    def clear(self) -> None:
+        """Drop every entry."""
+        self._slots = [None] * len(self._slots)
+
+    def probe(self, key: int) -> Optional[TTEntry]:
+        """Return the stored entry for key, if any."""
+        entry = self._slots[key & self._mask]
+        if entry is not None and entry.key == key:
+            return entry
+        return None
+
+    def store(self, key: int, depth: int, score: int, bound: int, best_move: Optional[int] = None) -> None:
+        """Record a search result, subject to the replacement policy."""
+        index = key & self._mask
+        current = self._slots[index]
+        if (current is None or current.key == key or
+                current.generation != self.generation or depth >= current.depth):
+            self._slots[index] = TTEntry(key, depth, score, bound, best_move, self.generation)
@@ -5,4 +5,10 @@ urlpatterns = [
     path("api/game/<int:game_id>/state/", views.get_game_state, name="get_game_state"),
     path("api/game/<int:game_id>/move/", views.move_pawn, name="move_pawn"),
     path("api/game/<int:game_id>/fence/", views.place_fence, name="place_fence"),
+    path("api/game/<int:game_id>/actions/", views.play_actions, name="play_actions"),
+    path("api/game/<int:game_id>/fence-impact/", views.fence_impact, name="fence_impact"),
+    path("api/game/<int:game_id>/stream/", views.stream_game_state, name="stream_game_state"),
+    path("api/async/game/<int:game_id>/state/", views.get_game_state_async, name="get_game_state_async"),
+    path("api/async/game/<int:game_id>/move/", views.move_pawn_async, name="move_pawn_async"),
+    path("api/async/game/<int:game_id>/fence/", views.place_fence_async, name="place_fence_async"),
 ]
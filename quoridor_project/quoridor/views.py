@@ -1,11 +1,80 @@
+from django.core.handlers.asgi import ASGIRequest
 from django.shortcuts import render
-from django.http import JsonResponse
+from django.http import HttpResponse, HttpResponseNotModified, JsonResponse, StreamingHttpResponse
+from django.utils.cache import patch_vary_headers
+from django.utils.http import parse_etags
 from django.views.decorators.csrf import csrf_exempt
 import json
-from .game import QuoridorEngine
+from .events import game_events
+from .game import StaleGameError
 from .models import Game
+from .registry import engine_registry
 
 # Create your views here.
+# Media type of Position.to_bytes(), served when a client asks for it in Accept.
+POSITION_CONTENT_TYPE = "application/vnd.quoridor.position"
+
+def _wants_position(request):
+    return request.get_preferred_type(["application/json", POSITION_CONTENT_TYPE]) == POSITION_CONTENT_TYPE
+
+def _state_etag(version, binary=False):
+    return f'"v{version}.bin"' if binary else f'"v{version}"'
+
+def _is_unchanged(request, version, binary=False):
+    """True when the client's If-None-Match already names this state version."""
+    etags = parse_etags(request.headers.get("If-None-Match", ""))
+    return "*" in etags or _state_etag(version, binary) in etags
+
+def _stored_state(game_id):
+    """
+    (version, encoded position) as committed, from a two-column query; None
+    for a missing game. The position is None before the first move. Cached
+    engines are not consulted, since another engine may have moved on since.
+    """
+    return Game.objects.filter(id=game_id).values_list("state_version", "position").first()
+
+async def _astored_state(game_id):
+    return await Game.objects.filter(id=game_id).values_list("state_version", "position").afirst()
+
+def _cheap_state_response(request, stored, binary):
+    """A 304 or binary response answered from the stored version alone, if possible."""
+    if stored is None:
+        return None
+    version, position = stored
+    if _is_unchanged(request, version, binary):
+        response = HttpResponseNotModified()
+        response["ETag"] = _state_etag(version, binary)
+    elif binary and position is not None:
+        response = _position_response(bytes(position), version)
+    else:
+        return None
+    patch_vary_headers(response, ["Accept"])
+    return response
+
+def _position_response(position, version):
+    response = HttpResponse(position, content_type=POSITION_CONTENT_TYPE)
+    response["ETag"] = _state_etag(version, binary=True)
+    patch_vary_headers(response, ["Accept"])
+    return response
+
+def _state_response(state):
+    response = JsonResponse(state)
+    response["ETag"] = _state_etag(state["version"])
+    patch_vary_headers(response, ["Accept"])
+    return response
+
+def _since(request):
+    """The ?since=<version> a client asked for changes from, or None."""
+    since = request.GET.get("since")
+    return None if since is None else int(since)
+
+def _state_or_changes(engine, since, binary):
+    """Changes since the client's version when the engine can tell, else the full state."""
+    if binary:
+        return _position_response(engine.get_state_bytes(), engine.game.state_version)
+    changes = engine.get_changes(since) if since is not None else None
+    return _state_response(changes if changes is not None else engine.get_state())
+
 @csrf_exempt
 def home(request):
     game = Game.objects.first()
@@ -13,9 +82,36 @@ def home(request):
 
 @csrf_exempt
 def get_game_state(request, game_id):
+    # Most polls find nothing new: answer those without building an engine.
+    binary = _wants_position(request)
+    if binary or "If-None-Match" in request.headers:
+        if response := _cheap_state_response(request, _stored_state(game_id), binary):
+            return response
     try:
-        engine = QuoridorEngine(game_id)
-        return JsonResponse(engine.get_state())
+        since = _since(request)
+    except ValueError:
+        return JsonResponse({"error": "Invalid version"}, status=400)
+    try:
+        engine = engine_registry.get(game_id)
+        return _state_or_changes(engine, since, binary)
+    except Game.DoesNotExist:
+        return JsonResponse({"error": "Game not found"}, status=404)
+
+@csrf_exempt
+def fence_impact(request, game_id):
+    # NumPy is only needed here, so the rest of the app runs without it.
+    try:
+        from .fence_analysis import evaluate_fences
+    except ImportError:
+        return JsonResponse({"error": "Fence analysis needs NumPy"}, status=501)
+    try:
+        engine = engine_registry.get(game_id)
+        impact = evaluate_fences(engine.copy_position())
+        return JsonResponse({
+            "legal": impact.legal.tolist(),
+            "distances": impact.distances.tolist(),
+            "baseline": impact.baseline.tolist()
+        })
     except Game.DoesNotExist:
         return JsonResponse({"error": "Game not found"}, status=404)
 
@@ -27,7 +123,7 @@ def move_pawn(request, game_id):
             data = json.loads(request.body)
             print(f"Parsed data: {data}")
 
-            engine = QuoridorEngine(game_id)
+            engine = engine_registry.get(game_id)
             old_state = engine.get_state()  
             print(f"Old state type: {type(old_state)}")
             
@@ -54,11 +150,17 @@ def move_pawn(request, game_id):
         except json.JSONDecodeError as e:
             print(f"JSON decode error: {e}")
             return JsonResponse({"error": "Invalid JSON"}, status=400)
+
+        except StaleGameError as e:
+            print(f"Stale engine: {e}")
+            engine_registry.discard(game_id)
+            return JsonResponse({"error": "Game changed, retry the move"}, status=409)
         
         except Exception as e:
             print(f"EXCEPTION: {type(e).__name__}: {e}")
             import traceback
             traceback.print_exc()
+            engine_registry.discard(game_id)
             return JsonResponse({"error": str(e)}, status=400)
 
 @csrf_exempt
@@ -66,7 +168,7 @@ def place_fence(request, game_id):
     if request.method == "POST":
         try:
             data = json.loads(request.body)
-            engine = QuoridorEngine(game_id)
+            engine = engine_registry.get(game_id)
             success = engine.place_fence(
                 data["player_id"],
                 data["x"],
@@ -74,6 +176,166 @@ def place_fence(request, game_id):
                 data["orientation"]
             )
             return JsonResponse({"success": success, "state": engine.get_state()})
+        except StaleGameError:
+            engine_registry.discard(game_id)
+            return JsonResponse({"error": "Game changed, retry the move"}, status=409)
         except Exception as e:
+            engine_registry.discard(game_id)
             return JsonResponse({"error": str(e)}, status=400)
-    return JsonResponse({"error": "Invalid request method"}, status=405)
\ No newline at end of file
+    return JsonResponse({"error": "Invalid request method"}, status=405)
+
+def _coordinate(action, key):
+    """An action's x or y, which must be a JSON integer (not a float or boolean)."""
+    value = action[key]
+    if type(value) is not int:
+        raise ValueError(f"{key} must be an integer, got {value!r}")
+    return value
+
+def _parse_action(action):
+    """Turn one JSON action into the tuple QuoridorEngine.play_actions expects."""
+    x, y = _coordinate(action, "x"), _coordinate(action, "y")
+    if action["type"] == "move":
+        return ("move", action["player_id"], x, y)
+    if action["type"] == "fence":
+        if action["orientation"] not in ("H", "V"):
+            raise ValueError(f"Unknown orientation {action['orientation']!r}")
+        return ("fence", action["player_id"], x, y, action["orientation"])
+    raise ValueError(f"Unknown action type {action['type']!r}")
+
+@csrf_exempt
+def play_actions(request, game_id):
+    """
+    Apply an ordered list of actions in one commit, e.g. a replay import:
+    {"actions": [{"type": "move", "player_id": ..., "x": ..., "y": ...},
+                 {"type": "fence", ..., "orientation": "H"}, ...]}
+    Either all of them are applied or none are, and failed_index names the
+    first action that could not be played.
+    """
+    if request.method != "POST":
+        return JsonResponse({"error": "Invalid request method"}, status=405)
+    try:
+        actions = json.loads(request.body)["actions"]
+    except (json.JSONDecodeError, KeyError, TypeError):
+        return JsonResponse({"error": "Expected a JSON body with an actions list"}, status=400)
+    if not isinstance(actions, list):
+        return JsonResponse({"error": "Expected a JSON body with an actions list"}, status=400)
+
+    parsed = []
+    for index, action in enumerate(actions):
+        try:
+            parsed.append(_parse_action(action))
+        except (KeyError, TypeError, ValueError) as e:
+            return JsonResponse({"error": f"Malformed action: {e}", "failed_index": index}, status=400)
+
+    try:
+        engine = engine_registry.get(game_id)
+        failed_index = engine.play_actions(parsed)
+    except Game.DoesNotExist:
+        return JsonResponse({"error": "Game not found"}, status=404)
+    except StaleGameError:
+        engine_registry.discard(game_id)
+        return JsonResponse({"error": "Game changed, retry the batch"}, status=409)
+    except Exception as e:
+        engine_registry.discard(game_id)
+        return JsonResponse({"error": str(e)}, status=400)
+
+    if failed_index is not None:
+        return JsonResponse({
+            "success": False,
+            "failed_index": failed_index,
+            "state": engine.get_state()
+        }, status=400)
+    return JsonResponse({"success": True, "applied": len(parsed), "state": engine.get_state()})
+
+# Async versions of the game endpoints for ASGI deployments. They await the
+# ORM instead of holding a worker thread, and device notifications go out on
+# the scheduler thread, so slow clients only cost an idle coroutine each.
+async def get_game_state_async(request, game_id):
+    binary = _wants_position(request)
+    if binary or "If-None-Match" in request.headers:
+        if response := _cheap_state_response(request, await _astored_state(game_id), binary):
+            return response
+    try:
+        since = _since(request)
+    except ValueError:
+        return JsonResponse({"error": "Invalid version"}, status=400)
+    try:
+        engine = await engine_registry.aget(game_id)
+        return _state_or_changes(engine, since, binary)
+    except Game.DoesNotExist:
+        return JsonResponse({"error": "Game not found"}, status=404)
+
+@csrf_exempt
+async def move_pawn_async(request, game_id):
+    if request.method != "POST":
+        return JsonResponse({"error": "Invalid request method"}, status=405)
+    try:
+        data = json.loads(request.body)
+        engine = await engine_registry.aget(game_id)
+        success = await engine.amove_pawn(data["player_id"], data["x"], data["y"])
+        return JsonResponse({
+            "success": success,
+            "state": engine.get_state(),
+            "message": "" if success else "Invalid move"
+        }, status=200 if success else 400)
+    except json.JSONDecodeError:
+        return JsonResponse({"error": "Invalid JSON"}, status=400)
+    except Game.DoesNotExist:
+        return JsonResponse({"error": "Game not found"}, status=404)
+    except StaleGameError:
+        engine_registry.discard(game_id)
+        return JsonResponse({"error": "Game changed, retry the move"}, status=409)
+    except Exception as e:
+        engine_registry.discard(game_id)
+        return JsonResponse({"error": str(e)}, status=400)
+
+@csrf_exempt
+async def place_fence_async(request, game_id):
+    if request.method != "POST":
+        return JsonResponse({"error": "Invalid request method"}, status=405)
+    try:
+        data = json.loads(request.body)
+        engine = await engine_registry.aget(game_id)
+        success = await engine.aplace_fence(
+            data["player_id"],
+            data["x"],
+            data["y"],
+            data["orientation"]
+        )
+        return JsonResponse({"success": success, "state": engine.get_state()})
+    except Game.DoesNotExist:
+        return JsonResponse({"error": "Game not found"}, status=404)
+    except StaleGameError:
+        engine_registry.discard(game_id)
+        return JsonResponse({"error": "Game changed, retry the move"}, status=409)
+    except Exception as e:
+        engine_registry.discard(game_id)
+        return JsonResponse({"error": str(e)}, status=400)
+
+
+async def stream_game_state(request, game_id):
+    """
+    Server-sent events carrying the game's state after every committed move.
+
+    The current state is sent first unless the client has already seen it:
+    browsers resume with Last-Event-ID, other clients can pass ?since=<version>.
+    Needs the ASGI entry point: WSGI would buffer the endless response and
+    hold a worker thread forever, so it gets a 501 and clients poll /state/.
+    """
+    if not isinstance(request, ASGIRequest):
+        return JsonResponse({"error": "Streaming needs the ASGI server, poll the state endpoint"}, status=501)
+    since = request.headers.get("Last-Event-ID") or request.GET.get("since") or -1
+    try:
+        since = int(since)
+    except ValueError:
+        return JsonResponse({"error": "Invalid version"}, status=400)
+    try:
+        engine = await engine_registry.aget(game_id)
+    except Game.DoesNotExist:
+        return JsonResponse({"error": "Game not found"}, status=404)
+
+    engine.publish_state()
+    response = StreamingHttpResponse(game_events.stream(engine.game.id, since), content_type="text/event-stream")
+    response["Cache-Control"] = "no-cache"
+    response["X-Accel-Buffering"] = "no"
+    return response
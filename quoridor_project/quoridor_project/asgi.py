@@ -14,3 +14,9 @@ from django.core.asgi import get_asgi_application
 os.environ.setdefault("DJANGO_SETTINGS_MODULE", "quoridor_project.settings")
 
 application = get_asgi_application()
+
+# Only server processes get here (runserver's reloader parent never loads
+# the application), so only they connect to the broker at startup.
+from quoridor.mqtt_publisher import QuoridorMQTTPublisher  # noqa: E402
+
+QuoridorMQTTPublisher.start_for_server()
@@ -134,6 +134,25 @@ MQTT_CONFIG = {
     'BROKER_PORT': 1883,
     'KEEP_ALIVE': 60,
     'TOPIC_PREFIX': 'quoridor/device/',
+    # Outgoing messages held while the broker is slow or offline before the oldest are dropped
+    'MAX_PENDING': 1000,
+    # Connect as soon as wsgi.py/asgi.py load; other processes connect on first publish
+    'CONNECT_ON_STARTUP': True,
+    # paho-compatible client class; 'quoridor.fake_broker.InMemoryClient' runs without a broker
+    'CLIENT_FACTORY': 'paho.mqtt.client.Client',
+    # Bounds in seconds for the jittered exponential reconnect backoff
+    'RECONNECT_MIN_DELAY': 1,
+    'RECONNECT_MAX_DELAY': 60,
+}
+
+ENGINE_REGISTRY = {
+    'MAX_ENGINES': 256,
+    'TTL_SECONDS': 900,
+    'MAX_BYTES': 32 * 1024 * 1024,
+}
+
+AI_CONFIG = {
+    'TIME_BUDGET_MS': 500,
 }
 
 # Default primary key field type